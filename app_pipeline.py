@@ -0,0 +1,290 @@
+from dataclasses import dataclass
+from typing import Callable
+import plotly.graph_objects as go
+import beams as bm
+import capacity_curves
+import curve_cache as cc
+import numpy as np
+import section_selection as ss
+import sections_db as sect_db
+import instrumentation
+
+
+# Horizontal resolution the capacity curves are decimated to (about the plot width in pixels)
+PLOT_RESOLUTION = 1200
+# Total number of plotted points past which the curves are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 5000
+# Number of unbraced lengths the selection chart is built at
+SELECTION_CHART_LENGTHS = 200
+
+
+@dataclass
+class Stage:
+    """
+    A named step of a Pipeline.
+
+    'name', name of the stage (its result is available to later stages under this name)
+    'func', function computing the stage, called with its inputs as keyword arguments
+    'inputs', names of the parameters or earlier stages the stage depends on
+    'map_over', optional name of a list input; the stage is then computed per item and
+    only new items are passed to 'func' (as a list, returning a list of results)
+    """
+    name: str
+    func: Callable
+    inputs: tuple
+    map_over: str | None = None
+
+
+class Pipeline:
+    """
+    A chain of computation stages with explicitly declared inputs.
+
+    On each run a stage is recomputed only if one of its inputs changed since the
+    previous run; otherwise its previous result is reused. Stages are run in the
+    order they were added and may only depend on parameters and earlier stages.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.recomputed = []
+        self._state = {}
+
+    def add_stage(self, name: str, func: Callable, inputs: tuple = (), map_over: str | None = None) -> None:
+        '''
+        Adds a stage to the end of the pipeline
+        '''
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} is already defined")
+        if map_over is not None and map_over not in inputs:
+            raise ValueError(f"Stage {name!r} maps over {map_over!r}, which is not one of its inputs")
+        self.stages[name] = Stage(name, func, tuple(inputs), map_over)
+
+    def stage(self, name: str | None = None, inputs: tuple = (), map_over: str | None = None) -> Callable:
+        '''
+        Decorator form of add_stage
+        '''
+        def decorator(func: Callable) -> Callable:
+            self.add_stage(name or func.__name__, func, inputs, map_over)
+            return func
+        return decorator
+
+    def run(self, **params) -> dict:
+        '''
+        Runs the pipeline for the given parameters and returns a dict of every parameter
+        and stage result. The names of the stages that were recomputed are kept in
+        'recomputed'.
+        '''
+        values = dict(params)
+        versions = {}
+        self.recomputed = []
+        for stage in self.stages.values():
+            missing = [name for name in stage.inputs if name not in values]
+            if missing:
+                raise KeyError(f"Stage {stage.name!r} is missing inputs: {missing}")
+            # Stage inputs are compared by version, parameters by value
+            key = tuple(
+                ('stage', versions[name]) if name in versions else ('param', values[name])
+                for name in stage.inputs if name != stage.map_over)
+            state = self._state.get(stage.name)
+            if stage.map_over is None:
+                changed = state is None or state['key'] != key
+                if changed:
+                    with instrumentation.stage(f"app_pipeline.{stage.name}"):
+                        value = stage.func(**{name: values[name] for name in stage.inputs})
+                    state = {
+                        'key': key,
+                        'value': value,
+                        'version': 0 if state is None else state['version'] + 1,
+                    }
+            else:
+                state, changed = self._run_map_stage(stage, key, state, values)
+            if changed:
+                self.recomputed.append(stage.name)
+            self._state[stage.name] = state
+            values[stage.name] = state['value']
+            versions[stage.name] = state['version']
+        return values
+
+    def _run_map_stage(self, stage: Stage, key: tuple, state: dict | None, values: dict) -> tuple[dict, bool]:
+        '''
+        Runs a per-item stage, computing only items that have no result for the current inputs
+        '''
+        items = list(values[stage.map_over])
+        results = dict(state['results']) if state is not None and state['key'] == key else {}
+        new_items = [item for item in dict.fromkeys(items) if item not in results]
+        if new_items:
+            inputs = {name: values[name] for name in stage.inputs}
+            inputs[stage.map_over] = new_items
+            with instrumentation.stage(f"app_pipeline.{stage.name}"):
+                results.update(zip(new_items, stage.func(**inputs)))
+        # Only the results for the current items are kept
+        results = {item: results[item] for item in items}
+        changed = state is None or state['key'] != key or state['items'] != items
+        new_state = {
+            'key': key,
+            'items': items,
+            'results': results,
+            'value': [results[item] for item in items],
+            'version': 0 if state is None else state['version'] + changed,
+        }
+        return new_state, changed
+
+
+def sample_beam(steel_section: str, L_unbr: float, fy: float, omega_2: float, E: float, G: float, phi: float) -> dict:
+    '''
+    Returns the beam used for the example calculations with its section class and moment capacity
+    '''
+    beam = bm.steel_beam_from_section_name_si(steel_section, L_unbr, fy, omega_2, E, G, phi)
+    return {
+        'beam': beam,
+        'section_class': beam.section_class(),
+        'Mrxu': beam.moment_capacity(),
+    }
+
+
+def curves(
+        steel_sections: list,
+        min_length: float,
+        max_length: float,
+        curve_tolerance: float,
+        fy: float,
+        omega_2: float,
+        E: float,
+        G: float,
+        phi: float,
+        curve_cache: cc.CurveCache | None = None) -> list:
+    '''
+    Returns the adaptive (lengths, Mr) capacity curve of each of the given sections
+    '''
+    table = bm.section_table('si').subset(steel_sections)
+    return capacity_curves.adaptive_capacity_curves(
+        table, min_length, max_length, fy, omega_2, E, G, phi, rtol=curve_tolerance, cache=curve_cache)
+
+
+def transitions(steel_sections: list, fy: float, omega_2: float, E: float, G: float, phi: float) -> list:
+    '''
+    Returns the (plateau end, branch transition) unbraced lengths of each of the given sections
+    '''
+    return [
+        capacity_curves.transition_lengths(sect_db.CATALOG.section('si', name), fy, omega_2, E, G, phi)
+        for name in steel_sections]
+
+
+def figure(steel_sections: list, curves: list, transitions: list, L_unbr: float, sample_beam: dict) -> go.Figure:
+    '''
+    Returns the figure of factored moment resistance vs unbraced length.
+    Curves are decimated to the plot resolution (keeping their transition points) and are
+    drawn with WebGL once the total number of points passes WEBGL_THRESHOLD.
+    '''
+    fig = go.Figure()
+
+    fig.layout.title.text = "Factored moment resistance vs unbraced length"
+    fig.layout.xaxis.title = "Unbraced length (mm)"
+    fig.layout.yaxis.title = "Mr (Nm)"
+
+    fig.add_vline(x=L_unbr, line_width=1, line_dash="dash", line_color="green", name="Unbraced length")
+
+    decimated = [
+        capacity_curves.decimate_curve(lengths, Mr, PLOT_RESOLUTION, keep_lengths)
+        for (lengths, Mr), keep_lengths in zip(curves, transitions)]
+    n_points = sum(lengths.size for lengths, _ in decimated)
+    scatter = go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+
+    for beam_tag, (lengths, Mr) in zip(steel_sections, decimated):
+        fig.add_trace(
+            scatter(
+            x=lengths, 
+            y=Mr,
+            name=beam_tag
+            )
+        )
+
+    fig.add_trace(
+        scatter(
+            y=[sample_beam['Mrxu']],
+            x=[L_unbr],
+            name="Unbraced capcity for sample calculation"
+        )
+    )
+    return fig
+
+
+def selection_chart(
+        min_length: float,
+        max_length: float,
+        fy: float,
+        omega_2: float,
+        E: float,
+        G: float,
+        phi: float) -> ss.SelectionChart:
+    '''
+    Returns the lightest-section chart of the whole catalog between min_length and max_length
+    '''
+    lengths = np.linspace(min_length, max_length, SELECTION_CHART_LENGTHS)
+    return ss.SelectionChart.build(lengths, fy, omega_2, E, G, phi)
+
+
+def selection_figure(selection_chart: ss.SelectionChart) -> go.Figure:
+    '''
+    Returns the beam selection chart: the Mr curve of each section over the lengths where it
+    is the lightest section for the moments just below its curve
+    '''
+    fig = go.Figure()
+
+    fig.layout.title.text = "Beam selection chart (lightest section for Mf below each curve)"
+    fig.layout.xaxis.title = "Unbraced length (mm)"
+    fig.layout.yaxis.title = "Mr (Nm)"
+
+    chart = selection_chart
+    length_idx = np.repeat(np.arange(chart.lengths.size), np.diff(chart.offsets))
+    # One line per run of consecutive chart lengths where a section is on the envelope,
+    # drawn as a single trace with gaps between runs
+    order = np.lexsort((length_idx, chart.sections))
+    rows, length_idx, Mr = chart.sections[order], length_idx[order], chart.Mr[order]
+    breaks = np.flatnonzero((np.diff(rows) != 0) | (np.diff(length_idx) != 1)) + 1
+    x = np.insert(chart.lengths[length_idx], breaks, np.nan)
+    y = np.insert(Mr, breaks, np.nan)
+    names = np.insert(chart.names[rows].astype(object), breaks, "")
+
+    scatter = go.Scattergl if x.size > WEBGL_THRESHOLD else go.Scatter
+    fig.add_trace(
+        scatter(
+            x=x,
+            y=y,
+            text=names,
+            mode="lines",
+            hovertemplate="%{text}<br>L = %{x:.0f} mm<br>Mr = %{y:.0f} Nm<extra></extra>",
+            name="Lightest section"
+        )
+    )
+    return fig
+
+
+def build_app_pipeline() -> Pipeline:
+    '''
+    Returns the compute pipeline of the Streamlit app. Its parameters are the sidebar
+    inputs ('steel_sections', 'steel_section', 'L_unbr', 'min_length',
+    'max_length', 'curve_tolerance', 'omega_2', 'fy', 'E', 'G', 'phi') and the shared
+    'curve_cache' (may be None).
+    '''
+    pipeline = Pipeline()
+    pipeline.add_stage('sample_beam', sample_beam, ('steel_section', 'L_unbr', 'fy', 'omega_2', 'E', 'G', 'phi'))
+    pipeline.add_stage(
+        'curves', curves,
+        ('steel_sections', 'min_length', 'max_length', 'curve_tolerance', 'fy', 'omega_2', 'E', 'G', 'phi', 'curve_cache'),
+        map_over='steel_sections')
+    pipeline.add_stage(
+        'transitions', transitions, ('steel_sections', 'fy', 'omega_2', 'E', 'G', 'phi'), map_over='steel_sections')
+    pipeline.add_stage('figure', figure, ('steel_sections', 'curves', 'transitions', 'L_unbr', 'sample_beam'))
+    return pipeline
+
+
+def build_selection_chart_pipeline() -> Pipeline:
+    '''
+    Returns the pipeline of the beam selection chart, kept apart from the app pipeline so
+    that it only runs while the chart is shown. Its parameters are 'min_length',
+    'max_length', 'omega_2', 'fy', 'E', 'G' and 'phi'.
+    '''
+    pipeline = Pipeline()
+    pipeline.add_stage('selection_chart', selection_chart, ('min_length', 'max_length', 'fy', 'omega_2', 'E', 'G', 'phi'))
+    pipeline.add_stage('selection_figure', selection_figure, ('selection_chart',))
+    return pipeline
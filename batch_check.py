@@ -0,0 +1,362 @@
+'''
+Streaming batch design check of steel beam members.
+
+Reads member rows (section, length, fy, omega_2, Mf) from a csv or jsonl file,
+checks them in chunks across a process pool and writes the moment resistance,
+utilization ratio and pass/fail of every member, in input order, as it goes.
+A row that cannot be checked (unknown section, malformed number, ...) gets the status
+ERROR and a message naming its input line; the other rows are checked as usual.
+Members without omega_2 may give their sampled moment diagram instead under 'moments'
+(a list in jsonl, ';'-separated in csv, equally spaced along the unbraced segment);
+omega_2 is then computed from it per CL 13.6.1.
+
+    python batch_check.py members.csv results.csv --workers 4 --chunk-size 5000
+'''
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import beams as bm
+
+
+INPUT_FIELDS = ('section', 'length', 'fy', 'omega_2', 'Mf')
+OUTPUT_FIELDS = INPUT_FIELDS + ('section_class', 'Mr', 'utilization', 'status', 'message')
+DEFAULT_OMEGA_2 = 1.0
+
+
+def read_chunks(path: str, chunk_size: int):
+    '''
+    Yields (format, fieldnames, lines, line_numbers) chunks of at most 'chunk_size' unparsed
+    member lines from a csv (with a header row) or jsonl file, with the (1-based) input line
+    number of each line. Parsing is left to the workers.
+    '''
+    file = sys.stdin if path == "-" else open(path, newline="")
+    try:
+        first_line = 1
+        if path.endswith(".jsonl") or path.endswith(".ndjson"):
+            file_format, fieldnames = "jsonl", None
+        else:
+            file_format, fieldnames = "csv", next(csv.reader([file.readline()]))
+            first_line = 2
+        numbered = ((number, line) for number, line in enumerate(file, first_line) if line.strip())
+        while chunk := list(itertools.islice(numbered, chunk_size)):
+            line_numbers, lines = zip(*chunk)
+            yield file_format, fieldnames, list(lines), list(line_numbers)
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def parse_members(file_format: str, fieldnames: list | None, lines: list) -> list:
+    '''
+    Returns member rows as dicts from unparsed csv or jsonl lines
+    '''
+    if file_format == "jsonl":
+        return [json.loads(line) for line in lines]
+    return list(csv.DictReader(lines, fieldnames=fieldnames))
+
+
+def parse_member_lines(file_format: str, fieldnames: list | None, lines: list) -> list:
+    '''
+    Returns member rows as dicts from unparsed csv or jsonl lines, with the error in place
+    of any line that is not valid json (or not a json object)
+    '''
+    if file_format != "jsonl":
+        return parse_members(file_format, fieldnames, lines)
+    rows = []
+    for line in lines:
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Member is not a json object")
+        except ValueError as error:
+            row = error
+        rows.append(row)
+    return rows
+
+
+def _moment_diagram(moments) -> np.ndarray:
+    '''
+    Returns the sampled moment diagram of a member row as an array
+    '''
+    if isinstance(moments, str):
+        moments = moments.split(";")
+    diagram = np.asarray(moments, dtype=float)
+    if diagram.ndim != 1 or diagram.size < 2:
+        raise ValueError("'moments' needs at least two samples")
+    if not np.all(np.isfinite(diagram)):
+        raise ValueError("'moments' must be finite numbers")
+    return diagram
+
+
+def _number(row: dict, name: str, default: float | None = None, positive: bool = True) -> float:
+    '''
+    Returns a numeric field of a member row, naming the field if it is missing or malformed
+    '''
+    value = row.get(name)
+    if value in (None, "") and default is not None:
+        return default
+    if value in (None, ""):
+        raise ValueError(f"Missing {name!r}")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name!r} is not a number: {row[name]!r}") from None
+    if not np.isfinite(value) or (positive and value <= 0):
+        raise ValueError(f"{name!r} must be a finite{' positive' if positive else ''} number: {row[name]!r}")
+    return value
+
+
+def parse_member_inputs(row: dict, table: bm.SectionTable) -> tuple:
+    '''
+    Returns the validated (table row, length, fy, omega_2, moment diagram or None) of a member
+    row, raising a KeyError or ValueError naming the problem. omega_2 is DEFAULT_OMEGA_2
+    where the moment diagram is given instead.
+    '''
+    if isinstance(row, Exception):
+        raise row
+    section = row.get('section')
+    if section not in table.rows:
+        raise KeyError(f"Section {section!r} is not in the section database")
+    idx = table.rows[section]
+    fy = _number(row, 'fy')
+    # CSA S16:24 Table 2: sections beyond the class 4 web limit are not checked
+    if (table['d'][idx] - 2 * table['tf'][idx]) / table['tw'][idx] * fy**0.5 > 83000:
+        raise ValueError(f"Web of {section} is excessively slender at fy = {fy:g}")
+    diagram = None
+    if row.get('omega_2') in (None, "") and row.get('moments') not in (None, ""):
+        diagram = _moment_diagram(row['moments'])
+        omega_2 = DEFAULT_OMEGA_2
+    else:
+        omega_2 = _number(row, 'omega_2', DEFAULT_OMEGA_2)
+    return idx, _number(row, 'length'), fy, omega_2, diagram
+
+
+def _parse_member(row: dict, table: bm.SectionTable) -> tuple:
+    '''
+    Returns (table row, length, fy, omega_2, Mf, moment diagram or None) of a member row
+    '''
+    idx, length, fy, omega_2, diagram = parse_member_inputs(row, table)
+    return idx, length, fy, omega_2, _number(row, 'Mf', positive=False), diagram
+
+
+def member_error_message(error: Exception, row, line_number: int | None = None) -> str:
+    '''
+    Returns the message reported for a member row that could not be parsed, prefixed with
+    its input line when 'line_number' is given
+    '''
+    message = error.args[0] if error.args else str(error)
+    if isinstance(error, ValueError) and not isinstance(row, dict):
+        message = f"Invalid member line: {error}"
+    if line_number is not None:
+        message = f"line {line_number}: {message}"
+    return message
+
+
+def _parse_chunk(rows: list, table: bm.SectionTable) -> list:
+    '''
+    Returns the (positions, table rows, length, fy, omega_2, Mf, moment diagrams) columns of
+    a chunk in which every row is valid (see parse_member_inputs), raising at the first problem;
+    the fast path of check_members
+    '''
+    idx = np.array([table.rows[row['section']] for row in rows], dtype=np.intp)
+    length = np.array([float(row['length']) for row in rows])
+    fy = np.array([float(row['fy']) for row in rows])
+    Mf = np.array([float(row['Mf']) for row in rows])
+    if not (np.all(length > 0) & np.all(fy > 0) & np.all(np.isfinite(length + fy + Mf))):
+        raise ValueError("Invalid number")
+    if np.any((table['d'][idx] - 2 * table['tf'][idx]) / table['tw'][idx] * np.sqrt(fy) > 83000):
+        raise ValueError("Excessively slender web")
+    omega_2 = []
+    diagrams = []
+    for row in rows:
+        if row.get('omega_2') in (None, "") and row.get('moments') not in (None, ""):
+            omega_2.append(DEFAULT_OMEGA_2)
+            diagrams.append(_moment_diagram(row['moments']))
+        else:
+            value = row.get('omega_2')
+            omega_2.append(DEFAULT_OMEGA_2 if value in (None, "") else float(value))
+            diagrams.append(None)
+    if not all(np.isfinite(omega_2)) or min(omega_2) <= 0:
+        raise ValueError("Invalid omega_2")
+    return range(len(rows)), idx, length, fy, np.array(omega_2), Mf, diagrams
+
+
+def _parse_rows(rows: list, table: bm.SectionTable, results: list, line_numbers: list | None) -> list:
+    '''
+    Returns the parsed members of the valid rows of a chunk, filling in the ERROR output
+    row of every invalid one in 'results'
+    '''
+    parsed = []
+    for position, row in enumerate(rows):
+        try:
+            parsed.append((position, *_parse_member(row, table)))
+        except (KeyError, ValueError) as error:
+            message = member_error_message(error, row, None if line_numbers is None else line_numbers[position])
+            source = row if isinstance(row, dict) else {}
+            results[position] = {
+                **{name: source.get(name, "") for name in INPUT_FIELDS},
+                'section_class': "",
+                'Mr': "",
+                'utilization': "",
+                'status': "ERROR",
+                'message': message,
+            }
+    return parsed
+
+
+def check_members(rows: list, E: float = 200, G: float = 77, phi: float = 0.9, line_numbers: list | None = None) -> list:
+    '''
+    Returns the design check of a chunk of member rows as a list of output rows. Rows that
+    cannot be checked get the status ERROR and a message (prefixed with their input line
+    when 'line_numbers' is given) instead of failing the chunk.
+    '''
+    table = bm.section_table('si')
+    results = [None] * len(rows)
+    try:
+        columns = _parse_chunk(rows, table)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        # Some row is bad: parse them one at a time to find out which
+        parsed = _parse_rows(rows, table, results, line_numbers)
+        if not parsed:
+            return results
+        columns = zip(*parsed)
+
+    positions, idx, length, fy, omega_2, Mf, diagrams = columns
+    idx = np.array(idx, dtype=np.intp)
+    length, fy, omega_2, Mf = (np.array(values, dtype=float) for values in (length, fy, omega_2, Mf))
+    diagram_rows = [row for row, diagram in enumerate(diagrams) if diagram is not None]
+    if diagram_rows:
+        offsets = np.cumsum([0] + [diagrams[row].size for row in diagram_rows])
+        omega_2[diagram_rows] = bm.omega_2_from_moment_diagrams(
+            np.concatenate([diagrams[row] for row in diagram_rows]), offsets)
+
+    section_class_maj = bm.section_class_array(
+        table['bf'][idx], table['tf'][idx], table['d'][idx], table['tw'][idx], fy)[0]
+    Mr = bm.moment_capacity_array(
+        length,
+        *(table[name][idx] for name in ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')),
+        fy = fy,
+        omega_2 = omega_2,
+        E = E,
+        G = G,
+        phi = phi)
+    utilization = Mf / Mr
+
+    columns = zip(
+        [table.names[row] for row in idx],
+        length.tolist(),
+        fy.tolist(),
+        omega_2.tolist(),
+        Mf.tolist(),
+        section_class_maj.tolist(),
+        Mr.tolist(),
+        utilization.tolist(),
+        np.where(utilization <= 1, "PASS", "FAIL").tolist(),
+        itertools.repeat(""))
+    for position, values in zip(positions, columns):
+        results[position] = dict(zip(OUTPUT_FIELDS, values))
+    return results
+
+
+def check_chunk(
+        file_format: str,
+        fieldnames: list | None,
+        lines: list,
+        line_numbers: list | None = None,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9
+        ) -> str:
+    '''
+    Parses, checks and formats one chunk of member lines, returning the csv text of the results
+    '''
+    results = check_members(parse_member_lines(file_format, fieldnames, lines), E, G, phi, line_numbers)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerows(result.values() for result in results)
+    return out.getvalue()
+
+
+def run_batch_check(
+        chunks,
+        write,
+        workers: int | None = None,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9
+        ) -> int:
+    '''
+    Checks (format, fieldnames, lines, line_numbers) chunks across a process pool and passes the csv
+    text of each chunk of results to 'write' in input order. At most two chunks per
+    worker are in flight at a time so memory use does not grow with the input.
+    Returns the number of member rows checked.
+
+    'workers', number of worker processes (0 checks in the current process)
+    '''
+    count = 0
+    if workers == 0:
+        for file_format, fieldnames, lines, line_numbers in chunks:
+            write(check_chunk(file_format, fieldnames, lines, line_numbers, E, G, phi))
+            count += len(lines)
+        return count
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for file_format, fieldnames, lines, line_numbers in chunks:
+            in_flight.append((len(lines), pool.submit(check_chunk, file_format, fieldnames, lines, line_numbers, E, G, phi)))
+            if len(in_flight) >= 2 * workers:
+                n_lines, future = in_flight.popleft()
+                write(future.result())
+                count += n_lines
+        while in_flight:
+            n_lines, future = in_flight.popleft()
+            write(future.result())
+            count += n_lines
+    return count
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch moment resistance check of steel beam members (CSA S16:24)")
+    parser.add_argument("input", help="csv or jsonl file of members with fields: " + ", ".join(INPUT_FIELDS) + " ('-' for stdin csv)")
+    parser.add_argument("output", help="csv file to write the results to ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: cpu count, 0 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="member rows per chunk")
+    parser.add_argument("-E", type=float, default=200, help="elastic modulus (GPa)")
+    parser.add_argument("-G", type=float, default=77, help="shear modulus (GPa)")
+    parser.add_argument("--phi", type=float, default=0.9, help="resistance factor")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        csv.writer(out).writerow(OUTPUT_FIELDS)
+        start = time.perf_counter()
+        count = run_batch_check(
+            read_chunks(args.input, args.chunk_size),
+            out.write,
+            workers = args.workers,
+            E = args.E,
+            G = args.G,
+            phi = args.phi)
+        elapsed = time.perf_counter() - start
+    except (KeyError, ValueError) as error:
+        print(f"error: {error.args[0] if error.args else error}", file=sys.stderr)
+        return 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"Checked {count} members in {elapsed:.2f} s ({rate:,.0f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,14 @@
 from dataclasses import dataclass
 from math import pi
+import numpy as np
+import instrumentation
 import sections_db as sect_db
 
 
+# Identifies the design rules implemented below; bump when any capacity calculation changes
+CODE_VERSION = "CSA S16:24 r1"
+
+
 @dataclass
 class SteelBeam:
     """
@@ -79,9 +85,10 @@ class SteelBeam:
         '''
         return unbraced_moment(self.length, self.omega_2, self.Iy, self.J, self.Cw, self.E, self.G)
 
-    def moment_capacity(self) -> float:
+    def moment_capacity(self, derivatives: bool = False) -> float:
         '''
         Caclulate the moment capacity of a beam 
+        (with its derivatives when 'derivatives' is True, see moment_capacity)
         '''
         return moment_capacity(self.length,
                                 self.d,
@@ -99,7 +106,8 @@ class SteelBeam:
                                 self.omega_2,
                                 self.E,
                                 self.G,
-                                self.phi)
+                                self.phi,
+                                derivatives)
 
 def section_class(bf: float, tf: float, d: float, tw: float, fy: float) -> int:
     '''
@@ -181,6 +189,29 @@ def unbraced_moment(
     Mu = (omega_2 * pi / L_unbr) * ((E * Iy * G * J) + (pi * E / L_unbr)**2 * Iy * Cw) ** 0.5
     return Mu
 
+
+def unbraced_moment_derivatives(
+        L_unbr: float,
+        omega_2: float,
+        Iy: float,
+        J: float,
+        Cw: float,
+        E: float,
+        G: float
+        ) -> tuple[float, float, float]:
+    '''
+    Returns Mu and its partial derivatives with respect to the unbraced length and omega_2;
+    works on scalars and arrays alike
+    '''
+    torsion = E * Iy * G * J
+    warping = (pi * E / L_unbr)**2 * Iy * Cw
+    Mu = (omega_2 * pi / L_unbr) * (torsion + warping) ** 0.5
+    # Mu = omega_2 * pi * sqrt(E Iy G J / L^2 + (pi E)^2 Iy Cw / L^4)
+    dMu_dL = -Mu / L_unbr * (torsion + 2 * warping) / (torsion + warping)
+    dMu_domega_2 = Mu / omega_2
+    return Mu, dMu_dL, dMu_domega_2
+
+@instrumentation.timed("beams.moment_capacity")
 def moment_capacity(
     L_unbr: float,
     d: float,
@@ -198,12 +229,20 @@ def moment_capacity(
     omega_2: float = 1.0,
     E: float = 200, #GPa
     G: float = 77, # GPa
-    phi: float = 0.9) -> float:
+    phi: float = 0.9,
+    derivatives: bool = False) -> float:
     '''
     Caclulate the moment capacity of a beam 
+
+    With 'derivatives', returns (Mrxu, {'L_unbr': dMr/dL, 'fy': dMr/dfy, 'omega_2': dMr/domega_2})
+    instead, differentiated analytically within the governing CL 13.6.1 branch (the section
+    class is taken as fixed, as it only changes in steps with fy)
     '''
     section_class_maj = section_class(bf, tf, d, tw, fy)[0]
-    Mu = unbraced_moment(L_unbr, omega_2, Iy, J, Cw, E, G)
+    if derivatives:
+        Mu, dMu_dL, dMu_domega_2 = unbraced_moment_derivatives(L_unbr, omega_2, Iy, J, Cw, E, G)
+    else:
+        Mu = unbraced_moment(L_unbr, omega_2, Iy, J, Cw, E, G)
     Mpx = plastic_moment(Zx, Zy, fy)[0]
     Myx = yield_moment(Sx, Sy, fy)[0]
 
@@ -216,9 +255,27 @@ def moment_capacity(
         Mrxu = min(1.15 * phi * Myx * (1 - 0.28 * Myx / Mu), phi * Myx)
     else:
         Mrxu = phi * Mu
-    return Mrxu
+    if not derivatives:
+        return Mrxu
+
+    M_ref = Mpx if section_class_maj <= 2 else Myx
+    if Mu <= 0.67 * M_ref:
+        # Elastic branch: phi * Mu
+        dMr_dMu, dMr_dM_ref = phi, 0.0
+    elif Mrxu < phi * M_ref:
+        # Inelastic branch: 1.15 * phi * (M - 0.28 * M^2 / Mu)
+        dMr_dMu, dMr_dM_ref = 1.15 * phi * 0.28 * M_ref**2 / Mu**2, 1.15 * phi * (1 - 0.56 * M_ref / Mu)
+    else:
+        # Plateau: phi * M
+        dMr_dMu, dMr_dM_ref = 0.0, phi
+    return Mrxu, {
+        'L_unbr': dMr_dMu * dMu_dL,
+        'fy': dMr_dM_ref * M_ref / fy,
+        'omega_2': dMr_dMu * dMu_domega_2,
+    }
 
 
+@instrumentation.timed("beams.steel_beam_from_section_name_si")
 def steel_beam_from_section_name_si(
         section_name: str,
         length: float,
@@ -231,24 +288,570 @@ def steel_beam_from_section_name_si(
     '''
     Returns a SteelBeam dataclass instance based on a section name form the AISC section database
     '''
-    steel_beams = sect_db.aisc_w_sections('si')
+    section = sect_db.CATALOG.section('si', section_name)
     steel_beam = SteelBeam(beam_tag = section_name,
         length = length,
-        d = steel_beams.loc[section_name]['d'],
-        bf = steel_beams.loc[section_name]['bf'],
-        tf = steel_beams.loc[section_name]['tf'],
-        tw = steel_beams.loc[section_name]['tw'],
-        Ix = steel_beams.loc[section_name]['Ix'],
-        Iy = steel_beams.loc[section_name]['Iy'],
-        Sx = steel_beams.loc[section_name]['Sx'],
-        Sy = steel_beams.loc[section_name]['Sy'],
-        Zx = steel_beams.loc[section_name]['Zx'],
-        Zy = steel_beams.loc[section_name]['Zy'],
-        Cw = steel_beams.loc[section_name]['Cw'],
-        J = steel_beams.loc[section_name]['J'],
+        d = section['d'],
+        bf = section['bf'],
+        tf = section['tf'],
+        tw = section['tw'],
+        Ix = section['Ix'],
+        Iy = section['Iy'],
+        Sx = section['Sx'],
+        Sy = section['Sy'],
+        Zx = section['Zx'],
+        Zy = section['Zy'],
+        Cw = section['Cw'],
+        J = section['J'],
         omega_2 = omega_2,
         fy = fy,
         E = E,
         G = G,
         phi = phi)
-    return steel_beam
\ No newline at end of file
+    return steel_beam
+
+
+def section_class_array(bf, tf, d, tw, fy) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Returns the major and minor axis section classes for arrays of WF sections.
+    Array counterpart of section_class; the arguments broadcast against each other.
+    '''
+    bf, tf, d, tw, fy = (np.asarray(value, dtype=float) for value in (bf, tf, d, tw, fy))
+
+    # CSA S16:24 Table 2 Limits
+    flange_check = (bf / 2) / tf * np.sqrt(fy)
+    web_check = (d - 2 * tf) / tw * np.sqrt(fy)
+
+    if np.any(web_check > 83000):
+        raise ValueError(f"Web is excessively slender: {web_check.max()} > 83000. Choose a different section")
+
+    flange_class = 1 + (flange_check > 145) + (flange_check > 170) + (flange_check > 200)
+    web_class_maj = 1 + (web_check > 1100) + (web_check > 1700) + (web_check > 1900)
+    web_class_min = 1 + 2 * (web_check > 525) + (web_check > 1900)
+
+    section_class_maj = np.maximum(web_class_maj, flange_class) #for bending about X-X axis or major axis
+    section_class_min = np.maximum(web_class_min, flange_class) #for bending about Y-Y axis or minor axis
+    return section_class_maj, section_class_min
+
+
+@instrumentation.timed("beams.moment_capacity_array")
+def moment_capacity_array(
+    L_unbr,
+    d,
+    bf,
+    tf,
+    tw,
+    Iy,
+    Sx,
+    Sy,
+    Zx,
+    Zy,
+    Cw,
+    J,
+    fy,
+    omega_2 = 1.0,
+    E = 200, #GPa
+    G = 77, # GPa
+    phi = 0.9,
+    derivatives: bool = False) -> np.ndarray:
+    '''
+    Caclulate the moment capacity of many beams at once.
+    Array counterpart of moment_capacity; the arguments broadcast against each other.
+    With 'derivatives', returns (Mrxu, {'L_unbr': ..., 'fy': ..., 'omega_2': ...}) with the
+    partial derivatives as arrays, as moment_capacity does.
+    '''
+    L_unbr = np.asarray(L_unbr, dtype=float)
+    section_class_maj = section_class_array(bf, tf, d, tw, fy)[0]
+    if derivatives:
+        Mu, dMu_dL, dMu_domega_2 = unbraced_moment_derivatives(
+            L_unbr, np.asarray(omega_2, dtype=float), np.asarray(Iy, dtype=float), J, Cw, E, G)
+    else:
+        Mu = unbraced_moment(L_unbr, omega_2, np.asarray(Iy, dtype=float), J, Cw, E, G)
+    Mpx = plastic_moment(np.asarray(Zx, dtype=float), Zy, fy)[0]
+    Myx = yield_moment(np.asarray(Sx, dtype=float), Sy, fy)[0]
+
+    # CSA S16:24 CL 13.6.1
+    M_ref = np.where(section_class_maj <= 2, Mpx, Myx)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Mr_inelastic = np.minimum(1.15 * phi * M_ref * (1 - 0.28 * M_ref / Mu), phi * M_ref)
+    elastic = Mu <= 0.67 * M_ref
+    Mrxu = np.where(elastic, phi * Mu, Mr_inelastic)
+    if not derivatives:
+        return Mrxu
+
+    plateau = ~elastic & (Mr_inelastic >= phi * M_ref)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dMr_dMu = np.where(elastic, phi, np.where(plateau, 0.0, 1.15 * phi * 0.28 * M_ref**2 / Mu**2))
+        dMr_dM_ref = np.where(elastic, 0.0, np.where(plateau, phi, 1.15 * phi * (1 - 0.56 * M_ref / Mu)))
+    return Mrxu, {
+        'L_unbr': dMr_dMu * dMu_dL,
+        'fy': dMr_dM_ref * M_ref / np.asarray(fy, dtype=float),
+        'omega_2': dMr_dMu * dMu_domega_2,
+    }
+
+
+def omega_2_from_moments(M_max, M_a, M_b, M_c) -> np.ndarray:
+    '''
+    Returns the equivalent moment factor from the maximum moment and the moments at the quarter
+    point, midpoint and three-quarter point of the unbraced segment; the arguments broadcast.
+    A segment without moment gets 1.0.
+    '''
+    M_max, M_a, M_b, M_c = (np.abs(np.asarray(value, dtype=float)) for value in (M_max, M_a, M_b, M_c))
+    # CSA S16:24 CL 13.6.1a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        omega_2 = 4 * M_max / np.sqrt(M_max**2 + 4 * M_a**2 + 7 * M_b**2 + 4 * M_c**2)
+    return np.where(M_max > 0, np.minimum(omega_2, 2.5), 1.0)
+
+
+def quarter_point_moments(M, offsets, x = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Returns (M_max, M_a, M_b, M_c) of many sampled moment diagrams at once: the largest
+    absolute moment and the absolute moments at 1/4, 1/2 and 3/4 of each segment, linearly
+    interpolated between samples.
+
+    'M', moments of all segments one after another in a flat array
+    'offsets', start of each segment in 'M' followed by the end of the last one
+    'x', positions of the samples along their segment (increasing within a segment);
+    samples are taken as equally spaced when not given
+    '''
+    M = np.abs(np.asarray(M, dtype=float))
+    offsets = np.asarray(offsets, dtype=np.intp)
+    starts, ends = offsets[:-1], offsets[1:]
+    counts = ends - starts
+    if np.any(counts < 2):
+        raise ValueError("Every moment diagram needs at least two samples")
+    segment = np.repeat(np.arange(counts.size), counts)
+
+    # Position of each sample as a fraction of its segment length
+    if x is None:
+        s = (np.arange(M.size) - starts[segment]) / (counts - 1)[segment]
+    else:
+        x = np.asarray(x, dtype=float)
+        x_start, x_end = x[starts], x[ends - 1]
+        s = (x - x_start[segment]) / (x_end - x_start)[segment]
+
+    # Segments are laid out on one increasing axis (segment i over [2i, 2i + 1]) so that
+    # every quarter point of every segment is found with a single binary search
+    key = 2 * segment + s
+    targets = 2 * np.arange(counts.size)[:, np.newaxis] + np.array([0.25, 0.5, 0.75])
+    left = np.searchsorted(key, targets, side="right") - 1
+    left = np.clip(left, starts[:, np.newaxis], ends[:, np.newaxis] - 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.clip((targets - key[left]) / (key[left + 1] - key[left]), 0, 1)
+    t = np.nan_to_num(t)
+    M_abc = M[left] * (1 - t) + M[left + 1] * t
+
+    M_max = np.maximum.reduceat(M, starts)
+    return M_max, M_abc[:, 0], M_abc[:, 1], M_abc[:, 2]
+
+
+@instrumentation.timed("beams.omega_2_from_moment_diagrams")
+def omega_2_from_moment_diagrams(M, offsets, x = None) -> np.ndarray:
+    '''
+    Returns the equivalent moment factor of many sampled moment diagrams at once, one value
+    per segment, ready to be passed as omega_2 to moment_capacity_array.
+    See quarter_point_moments for the layout of 'M', 'offsets' and 'x'.
+    '''
+    return omega_2_from_moments(*quarter_point_moments(M, offsets, x))
+
+
+@instrumentation.timed("beams.moment_capacity_grid")
+def moment_capacity_grid(
+        sections,
+        lengths,
+        fy,
+        omega_2 = 1.0,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9
+        ) -> np.ndarray:
+    '''
+    Returns the moment capacity of every section at every unbraced length as an
+    array of shape (number of sections, number of lengths).
+
+    'sections', mapping of section property name to an array with one value per
+    section (e.g. rows of the section database)
+    'fy', 'omega_2', either scalars or arrays with one value per section
+    '''
+    if isinstance(sections, SectionTable) and np.ndim(fy) == 0:
+        return sections.invariants(fy, E, G).moment_capacity(lengths, omega_2, phi)
+
+    def per_section(value):
+        value = np.asarray(value, dtype=float)
+        return value[:, np.newaxis] if value.ndim == 1 else value
+
+    properties = {
+        name: per_section(sections[name])
+        for name in ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')
+    }
+    lengths = np.asarray(lengths, dtype=float)[np.newaxis, :]
+    return moment_capacity_array(
+        lengths,
+        fy = per_section(fy),
+        omega_2 = per_section(omega_2),
+        E = E,
+        G = G,
+        phi = phi,
+        **properties)
+
+
+class SectionTable:
+    """
+    A struct-of-arrays store of section properties: one contiguous float64 array
+    per numeric catalog column, plus the section names and a name to row index.
+
+    The table behaves as a mapping of property name to array, so it can be passed
+    straight to moment_capacity_grid. Individual beams are created as SteelBeamView
+    instances that read their section properties from the table.
+
+    Length-independent quantities are precomputed per (fy, E, G) by 'invariants'.
+    Subsets share the invariants of the table they were taken from.
+
+    'names', section names in row order
+    'columns', mapping of property name to an array with one value per section
+    'source', table this one was taken from by 'subset' (None for an original table)
+    'source_rows', rows of 'source' held by this table
+    """
+    max_invariants = 16
+
+    def __init__(self, names, columns: dict, source: "SectionTable | None" = None, source_rows = None):
+        self.names = tuple(str(name) for name in names)
+        self.rows = {name: idx for idx, name in enumerate(self.names)}
+        self.columns = {
+            name: np.ascontiguousarray(values, dtype=float)
+            for name, values in columns.items()
+            if np.asarray(values).dtype.kind in "biuf"
+        }
+        self.source = source
+        self.source_rows = source_rows
+        self._invariants = {}
+
+    @classmethod
+    def from_catalog(cls, units: str = 'si') -> "SectionTable":
+        '''
+        Returns a SectionTable over the section database (memory-mapped columns are shared, not copied)
+        '''
+        columns = sect_db.CATALOG.columns(units)
+        return cls(columns['Section'], columns)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def index(self, section_name: str) -> int:
+        '''
+        Returns the row index of a section
+        '''
+        try:
+            return self.rows[section_name]
+        except KeyError:
+            raise KeyError(f"Section {section_name!r} is not in the section table") from None
+
+    def subset(self, section_names) -> "SectionTable":
+        '''
+        Returns a new SectionTable holding only the named sections, in the order given
+        '''
+        idx = np.array([self.index(name) for name in section_names], dtype=np.intp)
+        source, source_rows = self, idx
+        if self.source is not None:
+            source, source_rows = self.source, self.source_rows[idx]
+        return SectionTable(
+            [self.names[i] for i in idx],
+            {name: values[idx] for name, values in self.columns.items()},
+            source = source,
+            source_rows = source_rows)
+
+    @instrumentation.timed("beams.SectionTable.invariants")
+    def invariants(self, fy: float, E: float = 200, G: float = 77) -> "SectionInvariants":
+        '''
+        Returns the length-independent quantities of every section for (fy, E, G).
+        Built once per table and parameters (the least recently used are dropped beyond
+        max_invariants); a new catalog load gives a new table and so a fresh index.
+        '''
+        if self.source is not None:
+            return self.source.invariants(fy, E, G).take(self.source_rows)
+        key = (float(fy), float(E), float(G))
+        invariants = self._invariants.pop(key, None)
+        if invariants is None:
+            invariants = SectionInvariants.from_table(self, fy, E, G)
+            if len(self._invariants) >= self.max_invariants:
+                del self._invariants[next(iter(self._invariants))]
+        self._invariants[key] = invariants
+        return invariants
+
+    def beam(
+            self,
+            section_name: str,
+            length: float,
+            fy: float,
+            omega_2: float = 1.0,
+            E: float = 200,
+            G: float = 77,
+            phi: float = 0.9
+            ) -> "SteelBeamView":
+        '''
+        Returns a SteelBeamView of a section in this table
+        '''
+        return SteelBeamView(self, self.index(section_name), length, fy, omega_2, E, G, phi)
+
+
+def _table_property(name: str) -> property:
+    '''
+    Returns a read-only property that reads a section property from the view's table row
+    '''
+    def getter(self) -> float:
+        return float(self.table.columns[name][self.index])
+    getter.__name__ = name
+    return property(getter)
+
+
+class SteelBeamView:
+    """
+    A lightweight, SteelBeam-compatible beam backed by one row of a SectionTable.
+
+    Only the row index and the member parameters are stored on the instance; the
+    section properties ('d', 'bf', 'tf', 'tw', 'Ix', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy',
+    'Cw', 'J') are read from the table. All SteelBeam methods are available.
+
+    'table', SectionTable holding the section properties
+    'index', row of the section within the table
+    'length', Unbraced length of the beam
+    'fy', yield strength of steel
+    'omega_2', equivalent moment factor
+    'E', Modulus of elasticity
+    'G', shear modulus
+    'phi', resistance factor
+    """
+    __slots__ = ('table', 'index', 'length', 'fy', 'omega_2', 'E', 'G', 'phi')
+
+    def __init__(
+            self,
+            table: SectionTable,
+            index: int,
+            length: float,
+            fy: float,
+            omega_2: float = 1.0,
+            E: float = 200,
+            G: float = 77,
+            phi: float = 0.9):
+        self.table = table
+        self.index = index
+        self.length = length
+        self.fy = fy
+        self.omega_2 = omega_2
+        self.E = E
+        self.G = G
+        self.phi = phi
+
+    def __repr__(self) -> str:
+        return (f"SteelBeamView(beam_tag={self.beam_tag!r}, length={self.length!r}, fy={self.fy!r}, "
+                f"omega_2={self.omega_2!r}, E={self.E!r}, G={self.G!r}, phi={self.phi!r})")
+
+    @property
+    def beam_tag(self) -> str:
+        return self.table.names[self.index]
+
+    d = _table_property('d')
+    bf = _table_property('bf')
+    tf = _table_property('tf')
+    tw = _table_property('tw')
+    Ix = _table_property('Ix')
+    Iy = _table_property('Iy')
+    Sx = _table_property('Sx')
+    Sy = _table_property('Sy')
+    Zx = _table_property('Zx')
+    Zy = _table_property('Zy')
+    Cw = _table_property('Cw')
+    J = _table_property('J')
+
+    section_class = SteelBeam.section_class
+    yield_moment = SteelBeam.yield_moment
+    plastic_moment = SteelBeam.plastic_moment
+    unbraced_moment = SteelBeam.unbraced_moment
+    moment_capacity = SteelBeam.moment_capacity
+
+    def to_steel_beam(self) -> SteelBeam:
+        '''
+        Returns a standalone SteelBeam dataclass instance with the same properties
+        '''
+        return SteelBeam(
+            beam_tag = self.beam_tag,
+            length = self.length,
+            d = self.d,
+            bf = self.bf,
+            tf = self.tf,
+            tw = self.tw,
+            Ix = self.Ix,
+            Iy = self.Iy,
+            Sx = self.Sx,
+            Sy = self.Sy,
+            Zx = self.Zx,
+            Zy = self.Zy,
+            Cw = self.Cw,
+            J = self.J,
+            fy = self.fy,
+            omega_2 = self.omega_2,
+            E = self.E,
+            G = self.G,
+            phi = self.phi)
+
+
+_section_tables = {}
+
+
+def section_table(units: str = 'si') -> SectionTable:
+    '''
+    Returns the process-wide SectionTable over the section database, rebuilt when the catalog reloads
+    '''
+    columns = sect_db.CATALOG.columns(units)
+    cached = _section_tables.get(units)
+    if cached is None or cached[0] is not columns:
+        cached = (columns, SectionTable(columns['Section'], columns))
+        _section_tables[units] = cached
+    return cached[1]
+
+
+def unbraced_length_for_moment(Mu, omega_2, Iy, J, Cw, E, G) -> np.ndarray:
+    '''
+    Returns the unbraced length at which unbraced_moment equals Mu (inverse of unbraced_moment).
+    Mu**2 is a quadratic in 1/L**2, solved here in closed form; the arguments broadcast.
+    '''
+    Mu, omega_2, Iy, J, Cw, E, G = (np.asarray(value, dtype=float) for value in (Mu, omega_2, Iy, J, Cw, E, G))
+    a = E * Iy * G * J
+    b = (pi * E)**2 * Iy * Cw
+    c = (Mu / (omega_2 * pi))**2
+    # Root of b*u**2 + a*u - c = 0 with u = 1 / L**2, in a form that is stable for small b*c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = 2 * c / (a + np.sqrt(a**2 + 4 * b * c))
+        return 1 / np.sqrt(u)
+
+
+@instrumentation.timed("beams.max_unbraced_length")
+def max_unbraced_length(
+    Mf,
+    d,
+    bf,
+    tf,
+    tw,
+    Iy,
+    Sx,
+    Sy,
+    Zx,
+    Zy,
+    Cw,
+    J,
+    fy,
+    omega_2 = 1.0,
+    E = 200, #GPa
+    G = 77, # GPa
+    phi = 0.9) -> np.ndarray:
+    '''
+    Returns the longest unbraced length at which moment_capacity >= Mf, without iterating.
+    The arguments broadcast against each other. Returns inf when Mf <= 0 and nan when Mf
+    exceeds the capacity of the section at any length.
+    '''
+    Mf = np.asarray(Mf, dtype=float)
+    section_class_maj = section_class_array(bf, tf, d, tw, fy)[0]
+    Mpx = plastic_moment(np.asarray(Zx, dtype=float), Zy, fy)[0]
+    Myx = yield_moment(np.asarray(Sx, dtype=float), Sy, fy)[0]
+    M_ref = np.where(section_class_maj <= 2, Mpx, Myx)
+
+    # CSA S16:24 CL 13.6.1 solved for the Mu that gives Mr = Mf. Below 0.67 * phi * M_ref the
+    # elastic branch Mr = phi * Mu governs; above it, the inelastic branch.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Mu_required = np.where(
+            Mf <= 0.67 * phi * M_ref,
+            Mf / phi,
+            0.28 * M_ref / (1 - Mf / (1.15 * phi * M_ref)))
+    L_max = unbraced_length_for_moment(Mu_required, omega_2, Iy, J, Cw, E, G)
+    L_max = np.where(Mf > phi * M_ref, np.nan, L_max)
+    return np.where(Mf <= 0, np.inf, L_max)
+
+
+class SectionInvariants:
+    """
+    The length-independent quantities of the capacity calculation for every section of
+    a SectionTable at one (fy, E, G), so that evaluating a length only costs Mu.
+
+    'section_class_maj', 'section_class_min', section class for major and minor axis bending
+    'Mpx', 'Myx', plastic and yield moments about the major axis
+    'M_ref', moment the CL 13.6.1 branches are based on (Mpx for class 1 and 2, Myx otherwise)
+    'EIyGJ', product E * Iy * G * J
+    'IyCw', product Iy * Cw
+    """
+    def __init__(self, fy: float, E: float, G: float, section_class_maj, section_class_min, Mpx, Myx, EIyGJ, IyCw):
+        self.fy = fy
+        self.E = E
+        self.G = G
+        self.section_class_maj = section_class_maj
+        self.section_class_min = section_class_min
+        self.Mpx = Mpx
+        self.Myx = Myx
+        self.M_ref = np.where(section_class_maj <= 2, Mpx, Myx)
+        self.EIyGJ = EIyGJ
+        self.IyCw = IyCw
+
+    @classmethod
+    def from_table(cls, table: SectionTable, fy: float, E: float = 200, G: float = 77) -> "SectionInvariants":
+        '''
+        Returns the invariants of every section of a table
+        '''
+        section_class_maj, section_class_min = section_class_array(table['bf'], table['tf'], table['d'], table['tw'], fy)
+        return cls(
+            fy, E, G,
+            section_class_maj,
+            section_class_min,
+            Mpx = plastic_moment(table['Zx'], table['Zy'], fy)[0],
+            Myx = yield_moment(table['Sx'], table['Sy'], fy)[0],
+            EIyGJ = E * table['Iy'] * G * table['J'],
+            IyCw = table['Iy'] * table['Cw'])
+
+    def __len__(self) -> int:
+        return len(self.M_ref)
+
+    def take(self, rows) -> "SectionInvariants":
+        '''
+        Returns the invariants of the given rows only
+        '''
+        return SectionInvariants(
+            self.fy, self.E, self.G,
+            **{name: getattr(self, name)[rows]
+               for name in ('section_class_maj', 'section_class_min', 'Mpx', 'Myx', 'EIyGJ', 'IyCw')})
+
+    def moment_capacity(self, lengths, omega_2 = 1.0, phi: float = 0.9) -> np.ndarray:
+        '''
+        Returns the moment capacity of every section at every length as an array of shape
+        (number of sections, number of lengths). 'omega_2' is a scalar or one value per section.
+        '''
+        lengths = np.asarray(lengths, dtype=float)[np.newaxis, :]
+        omega_2 = np.asarray(omega_2, dtype=float)
+        if omega_2.ndim == 1:
+            omega_2 = omega_2[:, np.newaxis]
+        return moment_capacity_from_invariants(
+            lengths,
+            self.M_ref[:, np.newaxis],
+            self.EIyGJ[:, np.newaxis],
+            self.IyCw[:, np.newaxis],
+            omega_2,
+            self.E,
+            phi)
+
+
+@instrumentation.timed("beams.moment_capacity_from_invariants")
+def moment_capacity_from_invariants(L_unbr, M_ref, EIyGJ, IyCw, omega_2 = 1.0, E = 200, phi = 0.9) -> np.ndarray:
+    '''
+    Caclulate the moment capacity of beams from their length-independent quantities
+    (see SectionInvariants); the arguments broadcast against each other
+    '''
+    L_unbr = np.asarray(L_unbr, dtype=float)
+    Mu = (omega_2 * pi / L_unbr) * (EIyGJ + (pi * E / L_unbr)**2 * IyCw) ** 0.5
+
+    # CSA S16:24 CL 13.6.1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Mr_inelastic = np.minimum(1.15 * phi * M_ref * (1 - 0.28 * M_ref / Mu), phi * M_ref)
+    return np.where(Mu > 0.67 * M_ref, Mr_inelastic, phi * Mu)
@@ -0,0 +1,193 @@
+'''
+Performance benchmarks of the section database, capacity kernels and app pipeline.
+
+    python benchmarks.py                               # run all, print a table
+    python benchmarks.py --output bench.json           # also save the results as json
+    python benchmarks.py --baseline bench.json         # compare against saved results
+    python benchmarks.py -k curves                     # only benchmarks whose name contains 'curves'
+
+With --baseline the exit code is 1 when any benchmark is slower than the baseline by
+more than --tolerance (default 25%).
+'''
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+import numpy as np
+import app_pipeline
+import beams as bm
+import capacity_curves
+import hand_calculations as hcalc
+import sections_db as sect_db
+
+
+DEFAULT_LENGTHS = np.arange(200, 30000, 200, dtype=float)
+DEFAULT_PARAMS = {
+    'steel_section': 'W150X22.5',
+    'L_unbr': 2000,
+    'min_length': 200,
+    'max_length': 30000,
+    'curve_tolerance': 1e-3,
+    'omega_2': 1.0,
+    'fy': 345,
+    'E': 200,
+    'G': 77,
+    'phi': 0.9,
+    'curve_cache': None,
+}
+
+
+def _sections(count: int | None) -> list:
+    names = sect_db.CATALOG.section_names('si')
+    return names if count is None else names[:count]
+
+
+def _curves(count: int | None):
+    table = bm.section_table('si').subset(_sections(count))
+    return lambda: bm.moment_capacity_grid(table, DEFAULT_LENGTHS, 345)
+
+
+def _adaptive_curves(count: int | None):
+    table = bm.section_table('si').subset(_sections(count))
+    return lambda: capacity_curves.adaptive_capacity_curves(table, 200, 30000, 345)
+
+
+def _render_handcalcs():
+    beam = bm.steel_beam_from_section_name_si('W150X22.5', 2000, 345)
+    section_class_maj = beam.section_class()[0]
+
+    def render():
+        hcalc.render_section_class.cache_clear()
+        hcalc.render_M.cache_clear()
+        hcalc.render_section_class(beam.bf, beam.tf, beam.d, beam.tw, beam.fy)
+        hcalc.render_M(beam.Sx, beam.Zx, beam.fy, beam.length, beam.E, beam.Iy, beam.G, beam.J, beam.Cw,
+                       beam.omega_2, section_class_maj, beam.phi)
+    return render
+
+
+def _pipeline_cold(count: int):
+    params = {**DEFAULT_PARAMS, 'steel_sections': _sections(count)}
+    return lambda: app_pipeline.build_app_pipeline().run(**params)
+
+
+def _pipeline_rerun_L_unbr(count: int):
+    params = {**DEFAULT_PARAMS, 'steel_sections': _sections(count)}
+    pipeline = app_pipeline.build_app_pipeline()
+    pipeline.run(**params)
+    L_unbr = iter(range(1, 10**9))
+    return lambda: pipeline.run(**{**params, 'L_unbr': next(L_unbr)})
+
+
+def _scalar_moment_capacity():
+    beam = bm.steel_beam_from_section_name_si('W150X22.5', 4000, 345)
+    return beam.moment_capacity
+
+
+BENCHMARKS = {
+    'sections_db.aisc_w_sections[cold]': lambda: (lambda: sect_db._frame_from_columns(sect_db.build_column_cache('si'))),
+    'sections_db.aisc_w_sections[warm]': lambda: (lambda: sect_db.aisc_w_sections('si')),
+    'sections_db.CATALOG.section': lambda: (lambda: sect_db.CATALOG.section('si', 'W150X22.5')),
+    'beams.steel_beam_from_section_name_si': lambda: (lambda: bm.steel_beam_from_section_name_si('W150X22.5', 4000, 345)),
+    'beams.moment_capacity[scalar]': _scalar_moment_capacity,
+    'curves[1 section]': lambda: _curves(1),
+    'curves[10 sections]': lambda: _curves(10),
+    'curves[all sections]': lambda: _curves(None),
+    'adaptive curves[all sections]': lambda: _adaptive_curves(None),
+    'hand_calculations.render': _render_handcalcs,
+    'app_pipeline[cold, 10 sections]': lambda: _pipeline_cold(10),
+    'app_pipeline[rerun L_unbr, 10 sections]': lambda: _pipeline_rerun_L_unbr(10),
+}
+
+
+def time_benchmark(func, repeat: int = 5, min_time: float = 0.2) -> dict:
+    '''
+    Returns timing statistics (seconds per call) of a zero-argument callable
+    '''
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    times = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'median': statistics.median(times),
+        'min': min(times),
+        'mean': statistics.mean(times),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def run_benchmarks(names: list | None = None, repeat: int = 5, min_time: float = 0.2) -> dict:
+    '''
+    Runs the named benchmarks (all by default) and returns the machine-readable results
+    '''
+    names = list(BENCHMARKS) if names is None else names
+    results = {}
+    for name in names:
+        results[name] = time_benchmark(BENCHMARKS[name](), repeat, min_time)
+    return {
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25) -> list:
+    '''
+    Returns (name, baseline median, current median, ratio, regressed) for every benchmark
+    present in both result sets
+    '''
+    rows = []
+    for name, current in results['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['median']
+        ratio = current['median'] / before if before > 0 else float("inf")
+        rows.append((name, before, current['median'], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the section database, capacity kernels and app pipeline")
+    parser.add_argument("-k", dest="keyword", default=None, help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timing repeats per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="approximate seconds per timing repeat")
+    parser.add_argument("--output", help="write the results as json to this file")
+    parser.add_argument("--baseline", help="json results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.keyword is None or args.keyword in name]
+    results = run_benchmarks(names, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if not args.baseline:
+        for name, stats in results['results'].items():
+            print(f"{name:45s} {_format_time(stats['median'])}")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressed = False
+    for name, before, after, ratio, slower in compare(results, baseline, args.tolerance):
+        flag = "  REGRESSION" if slower else ""
+        print(f"{name:45s} {_format_time(before)} -> {_format_time(after)} ({ratio:5.2f}x){flag}")
+        regressed = regressed or slower
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
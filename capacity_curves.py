@@ -0,0 +1,175 @@
+import numpy as np
+import beams as bm
+import curve_cache as cc
+
+
+def _section_properties(section) -> dict:
+    '''
+    Returns the properties of a section used by the capacity calculation as floats
+    '''
+    return {name: float(section[name]) for name in cc.CURVE_PROPERTIES}
+
+
+def _reference_moment(props: dict, fy: float) -> float:
+    '''
+    Returns the moment the CL 13.6.1 branches are based on: Mp for class 1 and 2 sections, My otherwise
+    '''
+    section_class_maj = bm.section_class(props['bf'], props['tf'], props['d'], props['tw'], fy)[0]
+    if section_class_maj <= 2:
+        return bm.plastic_moment(props['Zx'], props['Zy'], fy)[0]
+    return bm.yield_moment(props['Sx'], props['Sy'], fy)[0]
+
+
+def transition_lengths(
+        section,
+        fy: float,
+        omega_2: float = 1.0,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9
+        ) -> tuple[float, float]:
+    '''
+    Returns the unbraced lengths where the capacity curve changes shape:
+    the end of the phi * M plateau and the CL 13.6.1 switch to the elastic branch (Mu = 0.67 * M)
+    '''
+    props = _section_properties(section)
+    M_ref = _reference_moment(props, fy)
+    # 1.15 * phi * M * (1 - 0.28 * M / Mu) reaches phi * M at Mu = 0.28 * M / (1 - 1 / 1.15)
+    Mu = np.array([0.28 * M_ref / (1 - 1 / 1.15), 0.67 * M_ref])
+    L_plateau, L_transition = bm.unbraced_length_for_moment(Mu, omega_2, props['Iy'], props['J'], props['Cw'], E, G)
+    return float(L_plateau), float(L_transition)
+
+
+def adaptive_capacity_curve(
+        section,
+        min_length: float,
+        max_length: float,
+        fy: float,
+        omega_2: float = 1.0,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9,
+        rtol: float = 1e-3,
+        max_points: int = 10000
+        ) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Returns (lengths, Mr) of the capacity curve of a section between min_length and max_length,
+    sampled so that linear interpolation between points is within rtol * phi * Mp of the curve.
+
+    The plateau end and branch transition lengths are always included; the small step in Mr
+    at the branch transition is kept as two points at the same length. Intervals are bisected
+    where the curve bends until the midpoint interpolation error is within half the tolerance.
+
+    'section', mapping of section property name to value (e.g. a row of the section database)
+    'rtol', allowed interpolation error as a fraction of phi * Mp
+    '''
+    props = _section_properties(section)
+    M_ref = _reference_moment(props, fy)
+    EIyGJ = E * props['Iy'] * G * props['J']
+    IyCw = props['Iy'] * props['Cw']
+
+    def capacity(lengths):
+        return bm.moment_capacity_from_invariants(lengths, M_ref, EIyGJ, IyCw, omega_2, E, phi)
+
+    tolerance = rtol * phi * bm.plastic_moment(props['Zx'], props['Zy'], fy)[0]
+    min_width = (max_length - min_length) * 1e-9
+    L_plateau, L_transition = transition_lengths(section, fy, omega_2, E, G, phi)
+    seeds = [min_length, max_length, L_plateau, L_transition]
+    x = np.unique([length for length in seeds if min_length <= length <= max_length])
+    # A few evenly spaced points in each branch keep a lucky midpoint from hiding an S-bend
+    x = np.unique(np.concatenate([np.linspace(x0, x1, 5) for x0, x1 in zip(x[:-1], x[1:])]))
+    y = capacity(x)
+
+    if min_length < L_transition < max_length:
+        # Mr at the transition is taken exactly from both sides of the branch switch
+        idx = np.searchsorted(x, L_transition)
+        y[idx] = phi * 0.67 * M_ref
+        x = np.insert(x, idx, L_transition)
+        y = np.insert(y, idx, 1.15 * phi * M_ref * (1 - 0.28 / 0.67))
+
+    refine = np.diff(x) > min_width
+    while refine.any() and x.size < max_points:
+        left = np.flatnonzero(refine)
+        x_mid = (x[left] + x[left + 1]) / 2
+        y_mid = capacity(x_mid)
+        error = np.abs(y_mid - (y[left] + y[left + 1]) / 2)
+        # Both halves of an interval that needed its midpoint are checked again
+        needed = error > tolerance / 2
+        x = np.insert(x, left[needed] + 1, x_mid[needed])
+        y = np.insert(y, left[needed] + 1, y_mid[needed])
+        new_left = left[needed] + np.arange(np.count_nonzero(needed))
+        refine = np.zeros(x.size - 1, dtype=bool)
+        refine[new_left] = True
+        refine[new_left + 1] = True
+        refine &= np.diff(x) > min_width
+    return x, y
+
+
+def adaptive_capacity_curves(
+        table: bm.SectionTable,
+        min_length: float,
+        max_length: float,
+        fy: float,
+        omega_2: float = 1.0,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9,
+        rtol: float = 1e-3,
+        cache: cc.CurveCache | None = None
+        ) -> list:
+    '''
+    Returns the adaptive (lengths, Mr) capacity curve of every section of the table,
+    reading previously computed curves from the cache when one is given
+    '''
+    spec = (min_length, max_length, rtol)
+    sections = [{name: table[name][idx] for name in cc.CURVE_PROPERTIES} for idx in range(len(table))]
+    keys = [cc.curve_key(section, spec, fy, omega_2, E, G, phi, kind='adaptive') for section in sections]
+    cached = cache.get_many(keys) if cache is not None else {}
+
+    curves = []
+    computed = {}
+    for key, section in zip(keys, sections):
+        if key in cached:
+            x, y = cached[key].reshape(2, -1)
+        else:
+            x, y = adaptive_capacity_curve(section, min_length, max_length, fy, omega_2, E, G, phi, rtol)
+            computed[key] = np.concatenate([x, y])
+        curves.append((x, y))
+    if cache is not None:
+        cache.put_many(computed)
+    return curves
+
+
+def decimate_curve(
+        lengths: np.ndarray,
+        Mr: np.ndarray,
+        n_buckets: int,
+        keep_lengths: tuple = ()
+        ) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Returns (lengths, Mr) reduced to at most 4 points per bucket for plotting.
+
+    The length range is split into n_buckets equal widths (e.g. one per screen pixel) and the
+    first, last, lowest and highest point of each bucket are kept, so the drawn shape is the
+    same as the full curve at that resolution. Points at any of the keep_lengths (e.g. the
+    plateau end and branch transition from transition_lengths) are always kept.
+
+    'lengths', sorted unbraced lengths of the curve
+    '''
+    lengths = np.asarray(lengths, dtype=float)
+    Mr = np.asarray(Mr, dtype=float)
+    if lengths.size <= 4 * n_buckets:
+        return lengths, Mr
+    width = (lengths[-1] - lengths[0]) / n_buckets
+    bucket = np.minimum(((lengths - lengths[0]) / width).astype(np.int64), n_buckets - 1)
+    # Within each bucket the points are ordered by Mr: the first is the lowest, the last the highest
+    order = np.lexsort((Mr, bucket))
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1))
+    ends = np.append(starts[1:], lengths.size) - 1
+    keep = np.zeros(lengths.size, dtype=bool)
+    keep[starts] = True
+    keep[ends] = True
+    keep[order[starts]] = True
+    keep[order[ends]] = True
+    keep |= np.isin(lengths, keep_lengths)
+    return lengths[keep], Mr[keep]
@@ -0,0 +1,331 @@
+'''
+Local HTTP/JSON service for the CSA S16:24 beam checks.
+
+Requests to the calculation endpoints that arrive within a short window are coalesced
+into one vectorized evaluation, so many concurrent small requests cost about as much
+as one batched call.
+
+    python capacity_service.py --port 8765
+
+    GET  /health                      request and batch counts
+    GET  /sections                    names of all sections
+    GET  /sections/<name>             properties of a section
+    POST /moment_capacity             {"section", "length", "fy", "omega_2", "E", "G", "phi"}
+    POST /section_class               {"section", "fy"}
+    POST /select                      {"Mf", "length", "fy", "omega_2", "E", "G", "phi", "n_alternatives"}
+
+Units are mm, MPa, GPa and N-m as in the rest of the package; omega_2, E, G, phi and
+n_alternatives are optional.
+'''
+import argparse
+import asyncio
+import dataclasses
+import json
+import math
+import sys
+from typing import Callable
+from urllib.parse import unquote
+import numpy as np
+import beams as bm
+import section_selection as ss
+import sections_db as sect_db
+
+
+DEFAULTS = {'omega_2': 1.0, 'E': 200.0, 'G': 77.0, 'phi': 0.9}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class RequestBatcher:
+    """
+    Coalesces items submitted within 'window' seconds of each other into one call of
+    'evaluate', which takes a list of items and returns a list of results in the same order.
+    A batch is evaluated early once it holds 'max_batch' items.
+    """
+    def __init__(self, evaluate: Callable, window: float = 0.002, max_batch: int = 1024):
+        self.evaluate = evaluate
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item):
+        '''
+        Adds an item to the current batch and returns its result once the batch is evaluated
+        '''
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        '''
+        Evaluates the pending items and resolves their results
+        '''
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += 1
+        self.requests += len(pending)
+        try:
+            results = self.evaluate([item for item, _ in pending])
+        except Exception:
+            # Evaluate the items one by one so that only the failing ones get the error
+            for item, future in pending:
+                try:
+                    result = self.evaluate([item])[0]
+                except Exception as error:
+                    if not future.done():
+                        future.set_exception(error)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _number(body: dict, name: str) -> float:
+    '''
+    Returns a numeric field of a request body, falling back to DEFAULTS for optional fields
+    '''
+    if name not in body and name not in DEFAULTS:
+        raise ValueError(f"Missing field {name!r}")
+    value = float(body.get(name, DEFAULTS.get(name)))
+    if not math.isfinite(value) or value <= 0:
+        raise ValueError(f"Field {name!r} must be a finite positive number, got {value!r}")
+    return value
+
+
+def _section_name(body: dict) -> str:
+    '''
+    Returns the section name of a request body, checking that it is in the section database
+    '''
+    if 'section' not in body:
+        raise ValueError("Missing field 'section'")
+    name = body['section']
+    if not isinstance(name, str):
+        raise ValueError(f"Field 'section' must be a section name, got {name!r}")
+    if name not in bm.section_table('si').rows:
+        raise KeyError(f"Section {name!r} is not in the si section database")
+    return name
+
+
+def parse_capacity_request(body: dict) -> dict:
+    '''
+    Returns the validated item of a moment_capacity request
+    '''
+    item = {'section': _section_name(body)}
+    for name in ('length', 'fy', 'omega_2', 'E', 'G', 'phi'):
+        item[name] = _number(body, name)
+    return item
+
+
+def parse_section_class_request(body: dict) -> dict:
+    '''
+    Returns the validated item of a section_class request
+    '''
+    return {'section': _section_name(body), 'fy': _number(body, 'fy')}
+
+
+def parse_select_request(body: dict) -> dict:
+    '''
+    Returns the validated item of a lightest-section request
+    '''
+    item = {name: _number(body, name) for name in ('Mf', 'length', 'fy', 'omega_2', 'E', 'G', 'phi')}
+    item['n_alternatives'] = int(body.get('n_alternatives', 5))
+    if item['n_alternatives'] < 0:
+        raise ValueError(f"Field 'n_alternatives' must not be negative, got {item['n_alternatives']}")
+    return item
+
+
+def evaluate_capacities(items: list) -> list:
+    '''
+    Returns the section class and moment resistance of a batch of moment_capacity items
+    '''
+    table = bm.section_table('si')
+    idx = np.array([table.rows[item['section']] for item in items], dtype=np.intp)
+    values = {name: np.array([item[name] for item in items]) for name in ('length', 'fy', 'omega_2', 'E', 'G', 'phi')}
+    section_class_maj = bm.section_class_array(
+        table['bf'][idx], table['tf'][idx], table['d'][idx], table['tw'][idx], values['fy'])[0]
+    Mr = bm.moment_capacity_array(
+        values['length'],
+        *(table[name][idx] for name in ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')),
+        fy = values['fy'],
+        omega_2 = values['omega_2'],
+        E = values['E'],
+        G = values['G'],
+        phi = values['phi'])
+    return [
+        {**item, 'section_class': section_class, 'Mr': moment}
+        for item, section_class, moment in zip(items, section_class_maj.tolist(), Mr.tolist())]
+
+
+def evaluate_section_classes(items: list) -> list:
+    '''
+    Returns the major and minor axis section class of a batch of section_class items
+    '''
+    table = bm.section_table('si')
+    idx = np.array([table.rows[item['section']] for item in items], dtype=np.intp)
+    fy = np.array([item['fy'] for item in items])
+    section_class_maj, section_class_min = bm.section_class_array(
+        table['bf'][idx], table['tf'][idx], table['d'][idx], table['tw'][idx], fy)
+    return [
+        {**item, 'section_class': [maj, min_]}
+        for item, maj, min_ in zip(items, section_class_maj.tolist(), section_class_min.tolist())]
+
+
+def evaluate_selections(items: list) -> list:
+    '''
+    Returns the lightest adequate section of a batch of select items. Items sharing
+    E, G, phi and n_alternatives are searched together.
+    '''
+    groups = {}
+    for idx, item in enumerate(items):
+        groups.setdefault((item['E'], item['G'], item['phi'], item['n_alternatives']), []).append(idx)
+
+    results = [None] * len(items)
+    for (E, G, phi, n_alternatives), group in groups.items():
+        selections = ss.select_sections(
+            [items[idx]['Mf'] for idx in group],
+            [items[idx]['length'] for idx in group],
+            [items[idx]['fy'] for idx in group],
+            [items[idx]['omega_2'] for idx in group],
+            E, G, phi,
+            n_alternatives = n_alternatives)
+        for idx, selection in zip(group, selections):
+            results[idx] = dataclasses.asdict(selection)
+    return results
+
+
+class CapacityService:
+    """
+    The HTTP/JSON front end of the beam checks, with one RequestBatcher per calculation endpoint.
+    """
+    def __init__(self, window: float = 0.002, max_batch: int = 1024):
+        self.batchers = {
+            '/moment_capacity': (parse_capacity_request, RequestBatcher(evaluate_capacities, window, max_batch)),
+            '/section_class': (parse_section_class_request, RequestBatcher(evaluate_section_classes, window, max_batch)),
+            '/select': (parse_select_request, RequestBatcher(evaluate_selections, window, max_batch)),
+        }
+
+    async def respond(self, method: str, path: str, body: bytes) -> tuple[int, object]:
+        '''
+        Returns the (status, JSON value) response to a request
+        '''
+        path = unquote(path.split('?', 1)[0]).rstrip('/') or '/'
+        try:
+            if path in self.batchers:
+                if method != 'POST':
+                    return 405, {'error': f"{path} only accepts POST"}
+                parse, batcher = self.batchers[path]
+                request = json.loads(body or b'{}')
+                if not isinstance(request, dict):
+                    raise ValueError("Request body must be a JSON object")
+                return 200, await batcher.submit(parse(request))
+            if method != 'GET':
+                return 405, {'error': f"{path} only accepts GET"}
+            if path == '/health':
+                return 200, {
+                    'status': 'ok',
+                    **{name.strip('/'): {'requests': batcher.requests, 'batches': batcher.batches}
+                       for name, (_, batcher) in self.batchers.items()}}
+            if path == '/sections':
+                return 200, sect_db.CATALOG.section_names('si')
+            if path.startswith('/sections/'):
+                return 200, dict(sect_db.CATALOG.section('si', path[len('/sections/'):]))
+            return 404, {'error': f"No endpoint {path}"}
+        except KeyError as error:
+            return 404, {'error': error.args[0]}
+        except (ValueError, TypeError) as error:
+            return 400, {'error': str(error)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        '''
+        Serves the requests of one (keep-alive) connection
+        '''
+        try:
+            while request := await read_request(reader):
+                method, path, headers, body = request
+                status, value = await self.respond(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(format_response(status, value, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.Server:
+        '''
+        Starts listening and returns the asyncio server
+        '''
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple | None:
+    '''
+    Returns (method, path, headers, body) of the next HTTP/1.1 request of a connection,
+    or None once the client has closed it
+    '''
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, path, _ = line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return method, path, headers, body
+
+
+def format_response(status: int, value, keep_alive: bool = True) -> bytes:
+    '''
+    Returns the bytes of an HTTP/1.1 JSON response
+    '''
+    body = json.dumps(value).encode()
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def serve(host: str, port: int, window: float, max_batch: int) -> None:
+    # The section table is loaded before the first request rather than during it
+    bm.section_table('si')
+    server = await CapacityService(window, max_batch).start(host, port)
+    print(f"Serving on http://{host}:{server.sockets[0].getsockname()[1]}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP/JSON service for CSA S16:24 beam checks")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="time requests are collected into a batch (ms)")
+    parser.add_argument("--max-batch", type=int, default=1024, help="largest number of requests per batch")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.window_ms / 1000, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import beams as bm
+
+
+CURVE_PROPERTIES = ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "minor_project_pfse", "capacity_curves.sqlite3")
+
+
+def curve_key(
+        section: dict,
+        lengths,
+        fy: float,
+        omega_2: float = 1.0,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9,
+        kind: str = 'grid'
+        ) -> str:
+    '''
+    Returns the cache key of a capacity curve: a hash of the section properties, the
+    length grid, the material and code parameters and beams.CODE_VERSION
+
+    'kind', what 'lengths' describes ('grid' for the lengths themselves, or another
+    name for other curve specifications such as an adaptive curve's range and tolerance)
+    '''
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(bm.CODE_VERSION.encode())
+    digest.update(kind.encode())
+    digest.update(np.array([section[name] for name in CURVE_PROPERTIES], dtype=float).tobytes())
+    digest.update(np.array([fy, omega_2, E, G, phi], dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(lengths, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+class CurveCache:
+    """
+    A disk-backed store of capacity curves shared across sessions and processes.
+
+    Curves are held in a SQLite database as raw float64 bytes keyed by curve_key.
+    When the stored curves exceed 'max_bytes', the least recently used curves are
+    evicted.
+
+    'path', location of the SQLite database file
+    'max_bytes', upper bound on the total size of the stored curves
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 256 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_access = 0.0
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS curves ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS curves_last_access ON curves (last_access)")
+
+    def _now(self) -> float:
+        '''
+        Returns the current time, strictly increasing within this process so access order is kept
+        '''
+        self._last_access = max(time.time(), self._last_access + 1e-6)
+        return self._last_access
+
+    def get_many(self, keys: list) -> dict:
+        '''
+        Returns the cached curves for the given keys as a dict of key to array (misses are left out)
+        '''
+        if not keys:
+            return {}
+        with self._lock:
+            found = {}
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, value FROM curves WHERE key IN ({placeholders})", batch).fetchall()
+                found.update((key, np.frombuffer(value, dtype=float)) for key, value in rows)
+            if found:
+                now = self._now()
+                self._db.executemany(
+                    "UPDATE curves SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found])
+        return found
+
+    def get(self, key: str) -> np.ndarray | None:
+        '''
+        Returns the cached curve for a key, or None on a miss
+        '''
+        return self.get_many([key]).get(key)
+
+    def put_many(self, curves: dict) -> None:
+        '''
+        Stores curves given as a dict of key to array, then evicts least recently used
+        curves until the cache is within max_bytes
+        '''
+        if not curves:
+            return
+        rows = []
+        for key, values in curves.items():
+            value = np.ascontiguousarray(values, dtype=float).tobytes()
+            rows.append((key, value, len(value)))
+        with self._lock:
+            now = self._now()
+            rows = [row + (now,) for row in rows]
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO curves (key, value, size, last_access) VALUES (?, ?, ?, ?)", rows)
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def put(self, key: str, values) -> None:
+        '''
+        Stores one curve
+        '''
+        self.put_many({key: values})
+
+    def _evict(self) -> None:
+        '''
+        Deletes least recently used curves until the total size is within max_bytes
+        '''
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM curves").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        evict = []
+        for key, size in self._db.execute("SELECT key, size FROM curves ORDER BY last_access"):
+            if total - freed <= self.max_bytes:
+                break
+            evict.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM curves WHERE key = ?", evict)
+
+    def size(self) -> int:
+        '''
+        Returns the total size in bytes of the stored curves
+        '''
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM curves").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM curves").fetchone()[0]
+
+    def clear(self) -> None:
+        '''
+        Deletes every stored curve
+        '''
+        with self._lock:
+            self._db.execute("DELETE FROM curves")
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def capacity_curves(
+        table: bm.SectionTable,
+        lengths,
+        fy: float,
+        omega_2: float = 1.0,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9,
+        cache: CurveCache | None = None
+        ) -> np.ndarray:
+    '''
+    Returns the moment capacity of every section of the table at every length, as
+    moment_capacity_grid does, reading previously computed curves from the cache and
+    computing (and storing) only the missing ones
+    '''
+    lengths = np.asarray(lengths, dtype=float)
+    if cache is None:
+        return bm.moment_capacity_grid(table, lengths, fy, omega_2, E, G, phi)
+
+    keys = [
+        curve_key({name: table[name][idx] for name in CURVE_PROPERTIES}, lengths, fy, omega_2, E, G, phi)
+        for idx in range(len(table))
+    ]
+    cached = cache.get_many(keys)
+    curves = np.empty((len(table), lengths.size))
+    missing = []
+    for idx, key in enumerate(keys):
+        if key in cached:
+            curves[idx] = cached[key]
+        else:
+            missing.append(idx)
+    if missing:
+        missing_table = table.subset([table.names[idx] for idx in missing])
+        computed = bm.moment_capacity_grid(missing_table, lengths, fy, omega_2, E, G, phi)
+        curves[missing] = computed
+        cache.put_many({keys[idx]: curve for idx, curve in zip(missing, computed)})
+    return curves
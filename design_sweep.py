@@ -0,0 +1,168 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+import numpy as np
+import beams as bm
+
+
+# Order of the axes of a sweep result (parameters given as single values are left out)
+SWEEP_DIMS = ('fy', 'omega_2', 'E', 'G', 'phi', 'section', 'length')
+
+
+@dataclass
+class SweepResult:
+    """
+    Moment capacities over the Cartesian product of the swept parameters.
+
+    'dims', names of the axes of 'values', in SWEEP_DIMS order
+    'coords', mapping of axis name to the parameter values along that axis
+    'values', array of moment capacities with one axis per name in 'dims'
+    'fixed', parameters that were given as a single value
+    """
+    dims: tuple
+    coords: dict
+    values: np.ndarray
+    fixed: dict = field(default_factory=dict)
+
+    def sel(self, **labels) -> "SweepResult":
+        '''
+        Returns the result at the given parameter values (e.g. sel(fy=345, section='W310X38.7')),
+        dropping the selected axes
+        '''
+        index = []
+        dims = []
+        fixed = dict(self.fixed)
+        for dim in self.dims:
+            if dim in labels:
+                matches = np.flatnonzero(np.asarray(self.coords[dim]) == labels[dim])
+                if matches.size == 0:
+                    raise KeyError(f"{labels[dim]!r} is not a value of {dim!r}")
+                index.append(matches[0])
+                fixed[dim] = labels[dim]
+            else:
+                index.append(slice(None))
+                dims.append(dim)
+        unknown = set(labels) - set(self.dims)
+        if unknown:
+            raise KeyError(f"Not swept: {sorted(unknown)}")
+        return SweepResult(
+            tuple(dims),
+            {dim: self.coords[dim] for dim in dims},
+            self.values[tuple(index)],
+            fixed)
+
+
+def _sweep_block(
+        output: np.ndarray,
+        units: str,
+        section_rows: np.ndarray,
+        lengths: np.ndarray,
+        combos: list,
+        combo_start: int,
+        length_slice: slice) -> None:
+    '''
+    Writes the capacities of one block of the sweep into 'output', an array of shape
+    (number of combos, number of sections, number of lengths)
+    '''
+    table = bm.section_table(units)
+    for offset, (fy, omega_2, E, G, phi) in enumerate(combos):
+        invariants = table.invariants(fy, E, G).take(section_rows)
+        output[combo_start + offset, :, length_slice] = invariants.moment_capacity(lengths[length_slice], omega_2, phi)
+
+
+def _sweep_worker(shm_name: str, shape: tuple, *args) -> None:
+    '''
+    Process pool entry point: attaches to the shared output buffer and computes one block
+    '''
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        _sweep_block(np.ndarray(shape, dtype=float, buffer=shm.buf), *args)
+    finally:
+        shm.close()
+
+
+def _blocks(n_combos: int, n_lengths: int, n_blocks: int) -> list:
+    '''
+    Returns (combo start, combo stop, length slice) blocks splitting the sweep in about n_blocks
+    '''
+    if n_combos >= n_blocks:
+        bounds = np.linspace(0, n_combos, n_blocks + 1).astype(int)
+        return [(start, stop, slice(None)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    per_combo = -(-n_blocks // n_combos)
+    bounds = np.linspace(0, n_lengths, min(per_combo, n_lengths) + 1).astype(int)
+    return [
+        (combo, combo + 1, slice(start, stop))
+        for combo in range(n_combos)
+        for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+    ]
+
+
+def sweep(
+        length,
+        fy,
+        omega_2 = 1.0,
+        E = 200,
+        G = 77,
+        phi = 0.9,
+        sections = None,
+        units: str = 'si',
+        workers: int | None = None,
+        tasks_per_worker: int = 4
+        ) -> SweepResult:
+    '''
+    Returns the moment capacity over the Cartesian product of the given parameters.
+    Every parameter is either a single value or a sequence of values to sweep; 'sections'
+    is a sequence of section names (default: the whole catalog).
+
+    The product is split into blocks computed across a process pool. Workers read the
+    memory-mapped section catalog and write straight into a shared output buffer, so
+    only the parameter values are sent to them.
+
+    'workers', number of worker processes (default: cpu count, 0 = compute in this process)
+    '''
+    table = bm.section_table(units)
+    section_names = list(table.names) if sections is None else list(sections)
+    section_rows = np.array([table.index(name) for name in section_names], dtype=np.intp)
+
+    given = {'fy': fy, 'omega_2': omega_2, 'E': E, 'G': G, 'phi': phi}
+    swept = {name: np.ndim(value) > 0 for name, value in given.items()}
+    values = {name: list(np.atleast_1d(value)) for name, value in given.items()}
+    lengths = np.atleast_1d(np.asarray(length, dtype=float))
+    combos = list(itertools.product(*values.values()))
+    shape = (len(combos), len(section_rows), lengths.size)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0:
+        output = np.empty(shape)
+        _sweep_block(output, units, section_rows, lengths, combos, 0, slice(None))
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_sweep_worker, shm.name, shape, units, section_rows, lengths,
+                                combos[start:stop], start, length_slice)
+                    for start, stop, length_slice in _blocks(len(combos), lengths.size, workers * tasks_per_worker)
+                ]
+                for future in futures:
+                    future.result()
+            output = np.ndarray(shape, dtype=float, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    full_shape = tuple(len(values[name]) for name in given) + shape[1:]
+    output = output.reshape(full_shape)
+    coords = {name: np.asarray(values[name]) for name in given}
+    coords['section'] = np.asarray(section_names)
+    coords['length'] = lengths
+    keep = [swept.get(dim, True) for dim in SWEEP_DIMS]
+    if np.ndim(length) == 0:
+        keep[-1] = False
+    dims = tuple(dim for dim, kept in zip(SWEEP_DIMS, keep) if kept)
+    fixed = {dim: coords[dim][0] for dim, kept in zip(SWEEP_DIMS, keep) if not kept}
+    output = output.reshape(tuple(len(coords[dim]) for dim in dims))
+    return SweepResult(dims, {dim: coords[dim] for dim in dims}, output, fixed)
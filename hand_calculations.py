@@ -1,9 +1,30 @@
+from functools import lru_cache, wraps
 from numpy import sqrt
 from math import pi
-from handcalcs.decorator import handcalc
+import instrumentation
+
+
+def handcalc(**options):
+    '''
+    handcalcs' handcalc decorator, applied on the first call so that handcalcs is only
+    imported once a calculation is actually rendered
+    '''
+    def decorator(func):
+        rendered = None
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal rendered
+            if rendered is None:
+                from handcalcs.decorator import handcalc as handcalcs_handcalc
+                rendered = handcalcs_handcalc(**options)(func)
+            return rendered(*args, **kwargs)
+        return wrapper
+    return decorator
 
 
 ##
+@instrumentation.timed("hand_calculations.calc_M")
 @handcalc(override="long", precision=2)
 def calc_M(S_x: float, Z_x: float, f_y: float, L:float, E:float, I_y:float, G:float, J:float, Cw:float, omega_2:float, section_class: int, phi: float):
     """
@@ -22,6 +43,7 @@ def calc_M(S_x: float, Z_x: float, f_y: float, L:float, E:float, I_y:float, G:fl
     return M_yx, M_px, M_u, M_rxu
 
 
+@instrumentation.timed("hand_calculations.calc_section_class")
 @handcalc(precision=2)
 def calc_section_class(b_f: float, t_f: float, d: float, t_w: float, f_y: float):
     """
@@ -61,4 +83,54 @@ def calc_section_class(b_f: float, t_f: float, d: float, t_w: float, f_y: float)
 
     class_section = max(Flange_class, Web_class_maj), max(Flange_class, Web_class_min) #Major bending, Minor bending
 
-    return Check_flange, Flange_limit, Web_limit_maj, Web_limit_min, class_section
\ No newline at end of file
+    return Check_flange, Flange_limit, Web_limit_maj, Web_limit_min, class_section
+
+
+@lru_cache(maxsize=128)
+@instrumentation.timed("hand_calculations.render_section_class")
+def render_section_class(bf: float, tf: float, d: float, tw: float, fy: float) -> str:
+    '''
+    Returns the LaTeX of calc_section_class for a section given in mm and MPa.
+    Memoized on the numeric inputs (least recently used renders are evicted).
+    '''
+    import forallpeople as si
+    si.environment("structural")
+    latex, _ = calc_section_class(bf * si.mm, tf * si.mm, d * si.mm, tw * si.mm, fy)
+    return latex
+
+
+@lru_cache(maxsize=128)
+@instrumentation.timed("hand_calculations.render_M")
+def render_M(
+        Sx: float,
+        Zx: float,
+        fy: float,
+        L: float,
+        E: float,
+        Iy: float,
+        G: float,
+        J: float,
+        Cw: float,
+        omega_2: float,
+        section_class: int,
+        phi: float) -> str:
+    '''
+    Returns the LaTeX of calc_M for a section given in mm, MPa and GPa.
+    Memoized on the numeric inputs (least recently used renders are evicted).
+    '''
+    import forallpeople as si
+    si.environment("structural")
+    latex, _ = calc_M(
+        Sx * si.mm**3,
+        Zx * si.mm**3,
+        fy * si.MPa,
+        L * si.mm,
+        E * si.GPa,
+        Iy * si.mm**4,
+        G * si.GPa,
+        J * si.mm**4,
+        Cw * si.mm**6,
+        omega_2,
+        section_class,
+        phi)
+    return latex
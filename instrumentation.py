@@ -0,0 +1,137 @@
+'''
+Low-overhead timing instrumentation of the section database, capacity and handcalc paths.
+
+Instrumented functions count their calls and cumulative wall time while instrumentation
+is enabled (enable(), or the environment variable PFSE_INSTRUMENT=1). When disabled the
+only cost is one flag check per call. Both the on/off switch and the statistics are kept
+per thread, so concurrent app sessions (each script run has its own thread) neither
+switch each other's timing off nor mix their numbers.
+
+    import instrumentation
+    instrumentation.enable()
+    ...  # run calculations
+    print(instrumentation.to_json())
+'''
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Default of threads that have not called enable() or disable()
+_ENABLED_DEFAULT = os.environ.get("PFSE_INSTRUMENT", "") not in ("", "0")
+
+
+class _Local(threading.local):
+    enabled = _ENABLED_DEFAULT
+
+
+_local = _Local()
+
+
+def enable() -> None:
+    '''
+    Turns instrumentation on for the current thread
+    '''
+    _local.enabled = True
+
+
+def disable() -> None:
+    '''
+    Turns instrumentation off for the current thread (collected statistics are kept)
+    '''
+    _local.enabled = False
+
+
+def is_enabled() -> bool:
+    return _local.enabled
+
+
+def _stats() -> dict:
+    try:
+        return _local.stats
+    except AttributeError:
+        _local.stats = {}
+        return _local.stats
+
+
+def record(name: str, elapsed: float) -> None:
+    '''
+    Adds one call taking 'elapsed' seconds to the statistics of 'name'
+    '''
+    stats = _stats()
+    entry = stats.get(name)
+    if entry is None:
+        stats[name] = [1, elapsed]
+    else:
+        entry[0] += 1
+        entry[1] += elapsed
+
+
+def timed(name: str):
+    '''
+    Decorator counting the calls and cumulative wall time of a function under 'name'
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _local.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage(name: str):
+    '''
+    Context manager counting the wall time of a block under 'name'
+    '''
+    if not _local.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def reset() -> None:
+    '''
+    Clears the statistics of the current thread
+    '''
+    _stats().clear()
+
+
+def snapshot() -> dict:
+    '''
+    Returns the statistics of the current thread as {name: {'calls': n, 'total_s': t, 'mean_s': t / n}},
+    slowest first
+    '''
+    entries = sorted(_stats().items(), key=lambda item: item[1][1], reverse=True)
+    return {
+        name: {'calls': calls, 'total_s': total, 'mean_s': total / calls}
+        for name, (calls, total) in entries
+    }
+
+
+def to_json(indent: int | None = 2) -> str:
+    '''
+    Returns the statistics of the current thread as a json string
+    '''
+    return json.dumps(snapshot(), indent=indent)
+
+
+def dump(path: str) -> None:
+    '''
+    Writes the statistics of the current thread as json to a file
+    '''
+    with open(path, "w") as file:
+        file.write(to_json())
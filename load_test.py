@@ -0,0 +1,122 @@
+'''
+Load test of a running capacity_service.
+
+Opens 'concurrency' keep-alive connections to the service and sends requests over them
+as fast as they are answered, then reports the latency percentiles and throughput.
+
+    python capacity_service.py --port 8765 &
+    python load_test.py --port 8765 --endpoint moment_capacity --requests 20000 --concurrency 64
+'''
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import numpy as np
+import capacity_service as service
+import sections_db as sect_db
+
+
+def request_bodies(endpoint: str, n: int, seed: int = 0) -> list:
+    '''
+    Returns n random request bodies for an endpoint of the service
+    '''
+    rng = random.Random(seed)
+    names = sect_db.CATALOG.section_names('si')
+    bodies = []
+    for _ in range(n):
+        if endpoint == 'moment_capacity':
+            body = {'section': rng.choice(names), 'length': rng.uniform(200, 30000), 'fy': 345, 'omega_2': rng.uniform(1.0, 2.5)}
+        elif endpoint == 'section_class':
+            body = {'section': rng.choice(names), 'fy': rng.choice([300, 345, 350])}
+        elif endpoint == 'select':
+            body = {'Mf': rng.uniform(1e4, 1e6), 'length': rng.uniform(200, 15000), 'fy': 345}
+        else:
+            raise ValueError(f"Unknown endpoint {endpoint!r}")
+        bodies.append(json.dumps(body).encode())
+    return bodies
+
+
+async def _client(host: str, port: int, path: str, bodies: list, latencies: list) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+            await writer.drain()
+            line = await reader.readline()
+            headers = {}
+            while (header := await reader.readline()) not in (b'\r\n', b''):
+                name, _, value = header.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            await reader.readexactly(int(headers.get('content-length', 0)))
+            if line.split()[1] != b'200':
+                raise RuntimeError(f"{path} answered {line.decode().strip()}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load_test(
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        endpoint: str = 'moment_capacity',
+        requests: int = 10000,
+        concurrency: int = 64
+        ) -> dict:
+    '''
+    Sends 'requests' requests to an endpoint over 'concurrency' connections and returns
+    the number of requests, elapsed time, requests/sec and p50/p99 latency (ms)
+    '''
+    bodies = request_bodies(endpoint, requests)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, f"/{endpoint}", bodies[i::concurrency], latencies)
+        for i in range(min(concurrency, requests))))
+    elapsed = time.perf_counter() - start
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    return {
+        'requests': len(latencies),
+        'elapsed_s': elapsed,
+        'requests_per_s': len(latencies) / elapsed,
+        'p50_ms': float(p50),
+        'p99_ms': float(p99),
+    }
+
+
+async def _run_local(args) -> dict:
+    '''
+    Runs the load test against a service started in this process
+    '''
+    server = await service.CapacityService(args.window_ms / 1000).start(args.host, 0)
+    async with server:
+        return await run_load_test(args.host, server.sockets[0].getsockname()[1], args.endpoint, args.requests, args.concurrency)
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test of the capacity service")
+    parser.add_argument("--host", default="127.0.0.1", help="address of the service")
+    parser.add_argument("--port", type=int, default=8765, help="port of the service")
+    parser.add_argument("--endpoint", default="moment_capacity", choices=["moment_capacity", "section_class", "select"])
+    parser.add_argument("--requests", type=int, default=10000, help="total number of requests")
+    parser.add_argument("--concurrency", type=int, default=64, help="number of concurrent connections")
+    parser.add_argument("--local", action="store_true", help="start the service in this process instead of connecting to one")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="batching window of the --local service (ms)")
+    args = parser.parse_args(argv)
+
+    if args.local:
+        result = asyncio.run(_run_local(args))
+    else:
+        result = asyncio.run(run_load_test(args.host, args.port, args.endpoint, args.requests, args.concurrency))
+    print(
+        f"{result['requests']} requests in {result['elapsed_s']:.2f} s: "
+        f"{result['requests_per_s']:,.0f} req/s, p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,49 @@
+import time
 import streamlit as st
 import hand_calculations as hcalc
 import sections_db as sect_db
-import beams as bm
-import forallpeople as si
-import plotly.graph_objects as go
+import curve_cache as cc
+import app_pipeline
+import instrumentation
 
 
 #MAKE WIDE MODE DEFAULT
 st.set_page_config(layout='wide')
 
+
+# Capacity curves are shared across sessions and server restarts
+@st.cache_resource
+def capacity_curve_cache() -> cc.CurveCache:
+    return cc.CurveCache()
+
+
+# PERFORMANCE PANEL (per-stage timings of the last rerun, filled in at the end of the script)
+# The switch is set at the start of every script run and only applies to this session's thread
+show_performance = st.sidebar.toggle("Show performance panel", value=False)
+if show_performance:
+    instrumentation.enable()
+    instrumentation.reset()
+    rerun_start = time.perf_counter()
+else:
+    instrumentation.disable()
+performance_panel = st.sidebar.container()
+
+
 # SECTION DB AND SECTION GEOMETRY PROPERTIES
 st.sidebar.subheader("Results Parameters")
-steel_section_list = sect_db.aisc_w_sections('si').iloc[::-1]
-steel_sections = st.sidebar.multiselect("Pick sections", steel_section_list['Section'], default=steel_section_list['Section'][0])
+steel_section_list = sect_db.CATALOG.table('si').iloc[::-1]
+with st.sidebar.expander("Filter sections"):
+    d_max = st.number_input("Maximum depth, d (mm)", value=None, min_value=0.0)
+    bf_min = st.number_input("Minimum flange width, b$_{f}$ (mm)", value=None, min_value=0.0)
+    Zx_min = st.number_input("Minimum plastic modulus, Z$_{x}$ (10$^{3}$ mm$^{3}$)", value=None, min_value=0.0)
+    W_max = st.number_input("Maximum mass, W (kg/m)", value=None, min_value=0.0)
+section_options = sect_db.CATALOG.query(
+    'si',
+    d = (None, d_max),
+    bf = (bf_min, None),
+    Zx = (None if Zx_min is None else Zx_min * 1e3, None),
+    W = (None, W_max))[::-1]
+steel_sections = st.sidebar.multiselect("Pick sections", section_options, default=section_options[:1])
 steel_section = st.sidebar.selectbox("Section for example calculations", steel_sections)
 try:
     steel_section_data = steel_section_list.loc[steel_section]        
@@ -24,8 +55,8 @@ except KeyError:
 # GLOBAL BEAM BRACING AND LOADING PROPERTIES
 L_unbr = st.sidebar.number_input("Unbraced length, L$_{unbr}$ (mm)", value=2000, min_value=1)
 min_length = st.sidebar.number_input("Minimum beam length (mm)", value=200, min_value=1)
-interval = st.sidebar.number_input("Length step interval (mm)", value=200, min_value=1)
-max_length = st.sidebar.number_input("Maximum beam length (mm)", value=30000, min_value = min_length + interval)
+max_length = st.sidebar.number_input("Maximum beam length (mm)", value=30000, min_value = min_length + 1)
+curve_tolerance = st.sidebar.number_input(r"Curve tolerance (% of $\phi$M$_{p}$)", value=0.1, min_value=0.001, format="%.3f") / 100
 omega_2 = st.sidebar.number_input("Equivalent moment factor, $\omega_{2}$", value=1.0, max_value=2.5, min_value=1.0)
 
 
@@ -36,99 +67,75 @@ G = st.sidebar.number_input("Shear modulus, G (GPa)", value=77, min_value=1)
 phi = st.sidebar.number_input("Resistance factor, $\phi$", value=0.9, min_value=0.1)
 
 
-## For sample calculations below
-steel_beam_sample_calc = bm.steel_beam_from_section_name_si(
-    steel_section, L_unbr, fy, omega_2, E, G, phi)
-
-
-## For sample calculations below
-section_class = steel_beam_sample_calc.section_class()
-section_class_maj = section_class[0]
-Mrxu = steel_beam_sample_calc.moment_capacity()
-
-
-## Accumulate all selected beams (and their properties) in a list
-steel_beams = []
-for beam in steel_sections:
-    steel_beams.append(bm.steel_beam_from_section_name_si(
-        beam, L_unbr, fy, omega_2, E, G, phi))
-
-
-#COORDINATES FOR UNBRACED MOMENT DIAGRAM
-x_coords = list(range(min_length, max_length, interval))
-
-y_coords = []
-for beam in steel_beams:
-    y_coords_i =[]
-    for x_coord in x_coords:
-        beam.length = x_coord
-        Mu_length = beam.moment_capacity()
-        y_coords_i.append(Mu_length)
-    y_coords.append(y_coords_i)
-
+## Staged computations: only the stages whose inputs changed are recomputed on a rerun
+if 'pipeline' not in st.session_state:
+    st.session_state.pipeline = app_pipeline.build_app_pipeline()
+results = st.session_state.pipeline.run(
+    steel_sections = steel_sections,
+    steel_section = steel_section,
+    L_unbr = L_unbr,
+    min_length = min_length,
+    max_length = max_length,
+    curve_tolerance = curve_tolerance,
+    omega_2 = omega_2,
+    fy = fy,
+    E = E,
+    G = G,
+    phi = phi,
+    curve_cache = capacity_curve_cache())
 
-# Plot lines
-fig = go.Figure()
-
-fig.layout.title.text = "Factored moment resistance vs unbraced length"
-fig.layout.xaxis.title = "Unbraced length (mm)"
-fig.layout.yaxis.title = "Mr (Nm)"
-
-
-fig.add_vline(x=L_unbr, line_width=1, line_dash="dash", line_color="green", name="Unbraced length")
-
-for idx, beam in enumerate(steel_beams):
-    fig.add_trace(
-        go.Scatter(
-        x=x_coords, 
-        y=y_coords[idx],
-        name=beam.beam_tag
-        )
-    )
-
-fig.add_trace(
-    go.Scatter(
-        y=[Mrxu],
-        x=[L_unbr],
-        name="Unbraced capcity for sample calculation"
-    )
-)
 
 st.header('Factored Moment Resistance of Unbraced WF Steel Section')
-st.plotly_chart(fig)
-
-
-## Handcalc rendering of sample calculations
-si.environment("structural")
+with instrumentation.stage("app.plotly_chart"):
+    st.plotly_chart(results['figure'])
 
+with st.expander("Beam selection chart (all sections)", key="selection_chart_expander", on_change="rerun") as expander:
+    if expander.open:
+        if 'selection_chart_pipeline' not in st.session_state:
+            st.session_state.selection_chart_pipeline = app_pipeline.build_selection_chart_pipeline()
+        selection_results = st.session_state.selection_chart_pipeline.run(
+            min_length = min_length,
+            max_length = max_length,
+            omega_2 = omega_2,
+            fy = fy,
+            E = E,
+            G = G,
+            phi = phi)
+        st.plotly_chart(selection_results['selection_figure'])
 
-# Defining units for the sample calculations
-bf_unit = steel_beam_sample_calc.bf * si.mm
-tf_unit = steel_beam_sample_calc.tf * si.mm
-d_unit = steel_beam_sample_calc.d * si.mm
-tw_unit = steel_beam_sample_calc.tw * si.mm
 
-Sx_unit = steel_beam_sample_calc.Sx * si.mm**3
-Zx_unit = steel_beam_sample_calc.Zx * si.mm**3
-fy_unit = fy * si.MPa
-L_unbr_unit = L_unbr * si.mm
-E_unit = E * si.GPa
-Iy_unit = steel_beam_sample_calc.Iy * si.mm**4
-G_unit = G * si.GPa
-J_unit = steel_beam_sample_calc.J * si.mm**4
-Cw_unit = steel_beam_sample_calc.Cw * si.mm**6
+## Handcalc rendering of sample calculations (rendered only while an expander is open)
+steel_beam_sample_calc = results['sample_beam']['beam']
+section_class_maj = results['sample_beam']['section_class'][0]
 
-section_class_latex, section_class_value = hcalc.calc_section_class(bf_unit, tf_unit, d_unit, tw_unit, fy)
-m_latex, m_value = hcalc.calc_M(Sx_unit, Zx_unit, fy_unit, L_unbr_unit, E_unit, Iy_unit, G_unit, J_unit, Cw_unit, omega_2, section_class_maj, phi)
 
 # Headers for Streamlit app
 st.header(f'Example Calculations for {steel_section_data['Section']}')
 
-with st.expander("Section class checks"):
-    st.latex(section_class_latex)
-
-with st.expander("Unbraced moment capacity of WF beam"):
-    st.latex(m_latex)
+with st.expander("Section class checks", key="section_class_expander", on_change="rerun") as expander:
+    if expander.open:
+        st.latex(hcalc.render_section_class(
+            steel_beam_sample_calc.bf,
+            steel_beam_sample_calc.tf,
+            steel_beam_sample_calc.d,
+            steel_beam_sample_calc.tw,
+            fy))
+
+with st.expander("Unbraced moment capacity of WF beam", key="moment_expander", on_change="rerun") as expander:
+    if expander.open:
+        st.latex(hcalc.render_M(
+            steel_beam_sample_calc.Sx,
+            steel_beam_sample_calc.Zx,
+            fy,
+            L_unbr,
+            E,
+            steel_beam_sample_calc.Iy,
+            G,
+            steel_beam_sample_calc.J,
+            steel_beam_sample_calc.Cw,
+            omega_2,
+            section_class_maj,
+            phi))
 
 with st.expander("Assumptions and Exclusions"):
     st.write("The above sample calculations are based on CSA S16:24 and AISC Shapes Database v15.0 and assume the following:\n"
@@ -138,3 +145,13 @@ with st.expander("Assumptions and Exclusions"):
     "4) Beam is loaded at or below shear centre of the section or point of loading are brace points and considered to provide lateral or torsional restraint \n"
     "5) Metric units are utilized throughout."
     )
+
+
+if show_performance:
+    instrumentation.record("app.rerun", time.perf_counter() - rerun_start)
+    with performance_panel.expander("Performance (last rerun)", expanded=True):
+        timings = instrumentation.snapshot()
+        st.dataframe(
+            [{'stage': name, 'calls': stats['calls'], 'total (ms)': stats['total_s'] * 1000} for name, stats in timings.items()],
+            hide_index=True)
+        st.download_button("Download timings (json)", instrumentation.to_json(), file_name="timings.json", mime="application/json")
@@ -0,0 +1,319 @@
+'''
+Batch generator of hand calculation reports for steel beam members.
+
+Reads a member list (member, section, length, fy, omega_2) from a csv or jsonl file and
+writes the section class and moment resistance write-up of every member, one HTML (or
+LaTeX) document each, plus an index of all members. Members with the same inputs share
+one report, reports are rendered across a process pool, and reports already in the
+output folder are not rendered again, so an interrupted job can simply be run again.
+Rows that are not valid members are skipped, with a message naming their input line.
+
+    python report_generator.py members.csv reports/ --workers 4
+'''
+import argparse
+import hashlib
+import html
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import batch_check as bc
+import beams as bm
+
+
+REPORT_FIELDS = ('section', 'length', 'fy', 'omega_2')
+FORMATS = {'html': '.html', 'tex': '.tex'}
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-chtml.js"></script>
+</head>
+<body>
+<h1>{title}</h1>
+<p>{inputs}</p>
+<p>Calculations per {code_version} (AISC Shapes Database v15.0), metric units.</p>
+<h2>Section class</h2>
+{section_class}
+<h2>Unbraced moment resistance</h2>
+{moment}
+</body>
+</html>
+"""
+
+TEX_TEMPLATE = r"""\documentclass{{article}}
+\usepackage{{amsmath}}
+\usepackage[margin=2cm]{{geometry}}
+\begin{{document}}
+\section*{{{title}}}
+{inputs}
+
+Calculations per {code_version} (AISC Shapes Database v15.0), metric units.
+\subsection*{{Section class}}
+{section_class}
+\subsection*{{Unbraced moment resistance}}
+{moment}
+\end{{document}}
+"""
+
+
+_TEX_SPECIAL = {
+    '\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#', '_': r'\_',
+    '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}', '^': r'\textasciicircum{}',
+}
+
+
+def tex_escape(text: str) -> str:
+    '''
+    Returns text with the LaTeX special characters escaped (LaTeX counterpart of html.escape)
+    '''
+    return "".join(_TEX_SPECIAL.get(char, char) for char in text)
+
+
+def report_key(section: str, length: float, fy: float, omega_2: float, E: float, G: float, phi: float) -> str:
+    '''
+    Returns the file name stem of the report for a set of member inputs: members with
+    identical inputs (and code version) share a report
+    '''
+    inputs = json.dumps([bm.CODE_VERSION, section, length, fy, omega_2, E, G, phi])
+    digest = hashlib.blake2b(inputs.encode(), digest_size=8).hexdigest()
+    return f"{section}_{digest}"
+
+
+def read_members(path: str) -> tuple[list, list]:
+    '''
+    Returns the member rows of a csv or jsonl member list as dicts with numeric inputs, and
+    the messages (naming the input line) of the rows that are not valid members. omega_2 is
+    computed from the moment diagram of members that give one instead (see batch_check).
+    '''
+    table = bm.section_table('si')
+    members = []
+    errors = []
+    for file_format, fieldnames, lines, line_numbers in bc.read_chunks(path, 5000):
+        for row, line_number in zip(bc.parse_member_lines(file_format, fieldnames, lines), line_numbers):
+            try:
+                _, length, fy, omega_2, diagram = bc.parse_member_inputs(row, table)
+            except (KeyError, ValueError) as error:
+                errors.append(bc.member_error_message(error, row, line_number))
+                continue
+            if diagram is not None:
+                omega_2 = float(bm.omega_2_from_moment_diagrams(diagram, [0, diagram.size])[0])
+            members.append({
+                'member': str(row.get('member') or row['section']),
+                'section': row['section'],
+                'length': length,
+                'fy': fy,
+                'omega_2': omega_2,
+            })
+    return members, errors
+
+
+def render_report(
+        section: str,
+        length: float,
+        fy: float,
+        omega_2: float,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9,
+        report_format: str = 'html'
+        ) -> str:
+    '''
+    Returns the hand calculation report of one set of member inputs as an HTML or LaTeX document
+    '''
+    import hand_calculations as hcalc
+
+    beam = bm.steel_beam_from_section_name_si(section, length, fy, omega_2, E, G, phi)
+    section_class_latex = hcalc.render_section_class(beam.bf, beam.tf, beam.d, beam.tw, fy)
+    moment_latex = hcalc.render_M(
+        beam.Sx, beam.Zx, fy, length, E, beam.Iy, G, beam.J, beam.Cw, omega_2, beam.section_class()[0], phi)
+    inputs = f"L = {length:g} mm, fy = {fy:g} MPa, omega_2 = {omega_2:g}, E = {E:g} GPa, G = {G:g} GPa, phi = {phi:g}"
+    if report_format == 'tex':
+        return TEX_TEMPLATE.format(
+            title = tex_escape(section),
+            inputs = tex_escape(inputs),
+            code_version = bm.CODE_VERSION,
+            section_class = section_class_latex,
+            moment = moment_latex)
+    return HTML_TEMPLATE.format(
+        title = html.escape(section),
+        inputs = html.escape(inputs),
+        code_version = bm.CODE_VERSION,
+        section_class = html.escape(section_class_latex),
+        moment = html.escape(moment_latex))
+
+
+def _write_atomically(path: str, text: str) -> None:
+    '''
+    Writes a file through a temporary file so an interrupted job never leaves a partial report
+    '''
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_reports(reports: list, E: float, G: float, phi: float, report_format: str) -> int:
+    '''
+    Renders and writes (path, inputs) reports, returning the number written
+    '''
+    for path, inputs in reports:
+        _write_atomically(path, render_report(*inputs, E, G, phi, report_format))
+    return len(reports)
+
+
+def write_index(output_dir: str, members: list, reports: list, Mr: np.ndarray, report_format: str) -> str:
+    '''
+    Writes the index of all members (with a link to each member's report) and returns its path
+    '''
+    if report_format == 'tex':
+        rows = "\n".join(
+            f"{tex_escape(member['member'])} & {tex_escape(member['section'])} & {member['length']:g} & "
+            f"{member['fy']:g} & {member['omega_2']:g} & {moment:,.0f} & \\texttt{{{tex_escape(report)}}} \\\\"
+            for member, report, moment in zip(members, reports, Mr.tolist()))
+        text = (
+            "\\documentclass{article}\n\\usepackage[margin=2cm]{geometry}\n\\begin{document}\n"
+            "\\section*{Member calculation reports}\n\\begin{tabular}{lllllll}\n"
+            "Member & Section & L (mm) & fy (MPa) & $\\omega_2$ & Mr (Nm) & Report \\\\\n\\hline\n"
+            f"{rows}\n\\end{{tabular}}\n\\end{{document}}\n")
+    else:
+        rows = "\n".join(
+            f"<tr><td>{html.escape(member['member'])}</td><td>{html.escape(member['section'])}</td>"
+            f"<td>{member['length']:g}</td><td>{member['fy']:g}</td><td>{member['omega_2']:g}</td>"
+            f"<td>{moment:,.0f}</td><td><a href=\"{html.escape(report)}\">{html.escape(report)}</a></td></tr>"
+            for member, report, moment in zip(members, reports, Mr.tolist()))
+        text = (
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>Member calculation reports</title>\n"
+            "</head>\n<body>\n<h1>Member calculation reports</h1>\n<table>\n"
+            "<tr><th>Member</th><th>Section</th><th>L (mm)</th><th>fy (MPa)</th><th>omega_2</th>"
+            "<th>Mr (Nm)</th><th>Report</th></tr>\n"
+            f"{rows}\n</table>\n</body>\n</html>\n")
+    path = os.path.join(output_dir, "index" + FORMATS[report_format])
+    _write_atomically(path, text)
+    return path
+
+
+def _chunks(tasks: list, n_chunks: int) -> list:
+    '''
+    Returns the tasks split, in order, into at most n_chunks lists of about equal size
+    '''
+    chunk_size = max(math.ceil(len(tasks) / n_chunks), 1)
+    return [tasks[start:start + chunk_size] for start in range(0, len(tasks), chunk_size)]
+
+
+def generate_reports(
+        members: list,
+        output_dir: str,
+        workers: int | None = None,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9,
+        report_format: str = 'html',
+        tasks_per_worker: int = 4
+        ) -> dict:
+    '''
+    Writes the report of every member (once per distinct set of inputs, skipping reports
+    that already exist in output_dir) and the index. Returns the number of members,
+    distinct reports, reports rendered and reports reused.
+
+    'workers', number of worker processes (0 renders in the current process)
+    'tasks_per_worker', number of chunks the pending reports are split into per worker
+    '''
+    table = bm.section_table('si')
+    missing = [member['section'] for member in members if member['section'] not in table.rows]
+    if missing:
+        raise KeyError(f"Sections not in the section database: {sorted(set(missing))}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    extension = FORMATS[report_format]
+    reports = []
+    unique = {}
+    for member in members:
+        inputs = tuple(member[name] for name in REPORT_FIELDS)
+        report = report_key(*inputs, E, G, phi) + extension
+        reports.append(report)
+        unique.setdefault(report, inputs)
+    pending = {
+        report: inputs for report, inputs in unique.items()
+        if not os.path.exists(os.path.join(output_dir, report))}
+    # Reports of the same section and fy are kept next to each other so that a worker
+    # renders their (memoized) section class write-up only once per chunk
+    tasks = sorted(
+        ((os.path.join(output_dir, report), inputs) for report, inputs in pending.items()),
+        key=lambda task: (task[1][0], task[1][2]))
+
+    if workers == 0:
+        write_reports(tasks, E, G, phi, report_format)
+    elif tasks:
+        workers = workers or os.cpu_count() or 1
+        chunks = _chunks(tasks, workers * tasks_per_worker)
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            futures = [pool.submit(write_reports, chunk, E, G, phi, report_format) for chunk in chunks]
+            for future in futures:
+                future.result()
+
+    idx = np.array([table.rows[member['section']] for member in members], dtype=np.intp)
+    Mr = bm.moment_capacity_array(
+        np.array([member['length'] for member in members]),
+        *(table[name][idx] for name in ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')),
+        fy = np.array([member['fy'] for member in members]),
+        omega_2 = np.array([member['omega_2'] for member in members]),
+        E = E,
+        G = G,
+        phi = phi)
+    write_index(output_dir, members, reports, Mr, report_format)
+    return {
+        'members': len(members),
+        'reports': len(unique),
+        'rendered': len(pending),
+        'reused': len(unique) - len(pending),
+    }
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch hand calculation reports of steel beam members (CSA S16:24)")
+    parser.add_argument("input", help="csv or jsonl file of members with fields: member, " + ", ".join(REPORT_FIELDS))
+    parser.add_argument("output_dir", help="folder to write the reports and index to")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: cpu count, 0 = no pool)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="html", help="report format")
+    parser.add_argument("-E", type=float, default=200, help="elastic modulus (GPa)")
+    parser.add_argument("-G", type=float, default=77, help="shear modulus (GPa)")
+    parser.add_argument("--phi", type=float, default=0.9, help="resistance factor")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        members, errors = read_members(args.input)
+        for message in errors:
+            print(f"skipped: {message}", file=sys.stderr)
+        counts = generate_reports(
+            members,
+            args.output_dir,
+            workers = args.workers,
+            E = args.E,
+            G = args.G,
+            phi = args.phi,
+            report_format = args.format)
+    except (KeyError, ValueError) as error:
+        print(f"error: {error.args[0] if error.args else error}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(
+        f"{counts['members']} members, {counts['reports']} distinct reports: "
+        f"{counts['rendered']} rendered, {counts['reused']} already done, {len(errors)} skipped ({elapsed:.2f} s)",
+        file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
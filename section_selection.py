@@ -0,0 +1,285 @@
+from dataclasses import dataclass, field
+import numpy as np
+import beams as bm
+
+
+@dataclass
+class SectionSelection:
+    """
+    The result of a lightest-adequate-section search for one demand case.
+
+    'Mf', factored moment demand
+    'section', name of the lightest section with Mr >= Mf (None if no section passes)
+    'W', mass per unit length of the selected section
+    'Mr', factored moment resistance of the selected section
+    'utilization', Mf / Mr of the selected section
+    'alternatives', (section name, W, Mr) of the next lightest passing sections, lightest first
+    """
+    Mf: float
+    section: str | None
+    W: float | None = None
+    Mr: float | None = None
+    utilization: float | None = None
+    alternatives: list = field(default_factory=list)
+
+
+def _section_order(table: bm.SectionTable) -> np.ndarray:
+    '''
+    Returns the row indices of the table sorted by mass (ties kept in table order)
+    '''
+    return np.argsort(table['W'], kind='stable')
+
+
+def select_sections(
+        Mf,
+        L_unbr,
+        fy,
+        omega_2 = 1.0,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9,
+        n_alternatives: int = 5,
+        table: bm.SectionTable | None = None,
+        chunk_size: int = 16
+        ) -> list[SectionSelection]:
+    '''
+    Returns the lightest section with moment_capacity >= Mf (plus the next lightest passing
+    sections) for each of a batch of demand cases. 'Mf', 'L_unbr', 'fy' and 'omega_2' are
+    scalars or arrays with one value per case.
+
+    Sections are visited in order of increasing mass, 'chunk_size' at a time, and only for
+    cases that are still looking for sections. Pairs whose plastic moment bound phi * Mp is
+    below Mf are skipped without evaluating the capacity.
+    '''
+    if table is None:
+        table = bm.section_table('si')
+    Mf, L_unbr, fy, omega_2 = np.broadcast_arrays(*(
+        np.atleast_1d(np.asarray(value, dtype=float)) for value in (Mf, L_unbr, fy, omega_2)))
+    n_cases = Mf.shape[0]
+    n_ranked = n_alternatives + 1
+
+    order = _section_order(table)
+    Zx = table['Zx']
+    ranked = np.full((n_cases, n_ranked), -1, dtype=np.intp)
+    ranked_Mr = np.zeros((n_cases, n_ranked))
+    found = np.zeros(n_cases, dtype=np.intp)
+
+    # Cases that no section in the table can carry are resolved up front
+    open_cases = np.flatnonzero(phi * Zx.max() * fy / 1000 >= Mf)
+
+    for start in range(0, len(order), chunk_size):
+        if open_cases.size == 0:
+            break
+        sections = order[start:start + chunk_size]
+
+        # Upper bound: Mr can never exceed phi * Mp
+        bound = phi * Zx[sections][np.newaxis, :] * fy[open_cases, np.newaxis] / 1000
+        cases, columns = np.nonzero(bound >= Mf[open_cases, np.newaxis])
+        if cases.size == 0:
+            continue
+        cases = open_cases[cases]
+        rows = sections[columns]
+
+        Mr = bm.moment_capacity_array(
+            L_unbr[cases],
+            *(table[name][rows] for name in ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')),
+            fy = fy[cases],
+            omega_2 = omega_2[cases],
+            E = E,
+            G = G,
+            phi = phi)
+        passing = Mr >= Mf[cases]
+        cases, rows, Mr = cases[passing], rows[passing], Mr[passing]
+        if cases.size == 0:
+            continue
+
+        # Rank of each passing pair among the sections already found for its case
+        # (pairs are grouped by case and ordered by mass within each group)
+        group_cases, group_start, group_count = np.unique(cases, return_index=True, return_counts=True)
+        rank = np.arange(cases.size) - np.repeat(group_start, group_count) + np.repeat(found[group_cases], group_count)
+        keep = rank < n_ranked
+        ranked[cases[keep], rank[keep]] = rows[keep]
+        ranked_Mr[cases[keep], rank[keep]] = Mr[keep]
+        found[group_cases] = np.minimum(found[group_cases] + group_count, n_ranked)
+        open_cases = open_cases[found[open_cases] < n_ranked]
+
+    W = table['W']
+    selections = []
+    for case in range(n_cases):
+        if found[case] == 0:
+            selections.append(SectionSelection(Mf=float(Mf[case]), section=None))
+            continue
+        entries = [
+            (table.names[row], float(W[row]), float(Mr))
+            for row, Mr in zip(ranked[case, :found[case]], ranked_Mr[case, :found[case]])
+        ]
+        section, section_W, section_Mr = entries[0]
+        selections.append(SectionSelection(
+            Mf = float(Mf[case]),
+            section = section,
+            W = section_W,
+            Mr = section_Mr,
+            utilization = float(Mf[case]) / section_Mr,
+            alternatives = entries[1:]))
+    return selections
+
+
+def select_section(
+        Mf: float,
+        L_unbr: float,
+        fy: float,
+        omega_2: float = 1.0,
+        E: float = 200,
+        G: float = 77,
+        phi: float = 0.9,
+        n_alternatives: int = 5,
+        table: bm.SectionTable | None = None
+        ) -> SectionSelection:
+    '''
+    Returns the lightest section with moment_capacity >= Mf, and the next lightest passing
+    sections as ranked alternatives
+    '''
+    return select_sections(Mf, L_unbr, fy, omega_2, E, G, phi, n_alternatives, table)[0]
+
+
+class SelectionChart:
+    """
+    A precomputed design chart of the lightest adequate section over (unbraced length, Mf)
+    for one fy, omega_2, E, G and phi.
+
+    For every chart length the sections are taken in order of increasing mass and only
+    those stronger than every lighter section are kept (the envelope). The lightest
+    section carrying Mf is then the first envelope section with Mr >= Mf, found by a
+    binary search. Lengths between chart lengths are looked up at the next longer chart
+    length, which is conservative as Mr decreases with length; at the first chart length
+    past a section's CL 13.6.1 switch to the elastic branch (where Mr steps up slightly)
+    its inelastic-side value is stored instead.
+
+    'names', section names; 'W', their mass per unit length
+    'lengths', increasing chart lengths
+    'offsets', start of the envelope of each chart length in 'sections' and 'Mr' (plus the end)
+    'sections', row in 'names' of each envelope section, lightest first
+    'Mr', moment resistance of each envelope section at its chart length, or the lower bound
+          above (increasing per length)
+    'params', the fy, omega_2, E, G and phi the chart was built for
+    """
+    def __init__(self, names, W, lengths, offsets, sections, Mr, params: dict):
+        self.names = np.asarray(names)
+        self.W = np.asarray(W, dtype=float)
+        self.lengths = np.asarray(lengths, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        self.sections = np.asarray(sections, dtype=np.intp)
+        self.Mr = np.asarray(Mr, dtype=float)
+        self.params = dict(params)
+
+    @classmethod
+    def build(
+            cls,
+            lengths,
+            fy: float,
+            omega_2: float = 1.0,
+            E: float = 200,
+            G: float = 77,
+            phi: float = 0.9,
+            table: bm.SectionTable | None = None
+            ) -> "SelectionChart":
+        '''
+        Returns the chart of every section of the table (default: the si catalog) at the given lengths
+        '''
+        if table is None:
+            table = bm.section_table('si')
+        lengths = np.unique(np.asarray(lengths, dtype=float))
+        order = _section_order(table)
+        invariants = table.invariants(fy, E, G).take(order)
+        Mr = invariants.moment_capacity(lengths, omega_2, phi)
+
+        # CSA S16:24 CL 13.6.1: Mr steps up from 1.15 * phi * M * (1 - 0.28 / 0.67) to
+        # 0.67 * phi * M where Mu drops to 0.67 * M. At the first chart length past that
+        # switch the inelastic-side value is kept, so that lookups between chart lengths
+        # stay conservative.
+        Mu = bm.unbraced_moment(
+            lengths[np.newaxis, :], omega_2,
+            *(table[name][order][:, np.newaxis] for name in ('Iy', 'J', 'Cw')), E, G)
+        elastic = Mu <= 0.67 * invariants.M_ref[:, np.newaxis]
+        switched = elastic & ~np.hstack([np.zeros((len(order), 1), dtype=bool), elastic[:, :-1]])
+        Mr_switch = 1.15 * phi * invariants.M_ref * (1 - 0.28 / 0.67)
+        Mr = np.where(switched, np.minimum(Mr, Mr_switch[:, np.newaxis]), Mr)
+
+        # A section is on the envelope if it is stronger than every lighter section
+        strongest_lighter = np.maximum.accumulate(Mr, axis=0)
+        strongest_lighter = np.vstack([np.full((1, lengths.size), -np.inf), strongest_lighter[:-1]])
+        # np.nonzero of the transpose lists the envelope length by length, lightest first
+        rank, length_idx = np.nonzero((Mr > strongest_lighter).T)[::-1]
+        counts = np.bincount(length_idx, minlength=lengths.size)
+        return cls(
+            table.names,
+            table['W'],
+            lengths,
+            np.concatenate([[0], np.cumsum(counts)]),
+            order[rank],
+            Mr[rank, length_idx],
+            {'fy': fy, 'omega_2': omega_2, 'E': E, 'G': G, 'phi': phi})
+
+    def lookup_rows(self, Mf, L_unbr) -> np.ndarray:
+        '''
+        Returns the row in 'names' of the lightest section carrying Mf at L_unbr, or -1 where
+        no section does or L_unbr is longer than the chart. The arguments broadcast.
+        '''
+        Mf, L_unbr = np.broadcast_arrays(np.asarray(Mf, dtype=float), np.asarray(L_unbr, dtype=float))
+        length_idx = np.searchsorted(self.lengths, L_unbr, side="left")
+        on_chart = length_idx < self.lengths.size
+        length_idx = np.minimum(length_idx, self.lengths.size - 1)
+
+        # Binary search for the first envelope entry with Mr >= Mf, for all queries at once
+        low = self.offsets[length_idx]
+        high = self.offsets[length_idx + 1]
+        end = high.copy()
+        while np.any(low < high):
+            searching = low < high
+            mid = (low + high) // 2
+            below = searching & (self.Mr[np.minimum(mid, self.Mr.size - 1)] < Mf)
+            low = np.where(below, mid + 1, low)
+            high = np.where(searching & ~below, mid, high)
+        found = on_chart & (low < end)
+        return np.where(found, self.sections[np.minimum(low, self.sections.size - 1)], -1)
+
+    def lookup(self, Mf, L_unbr):
+        '''
+        Returns the name of the lightest section carrying Mf at L_unbr (None if there is none),
+        or an array of names (None where there is none) if Mf or L_unbr are arrays
+        '''
+        rows = self.lookup_rows(Mf, L_unbr)
+        names = np.where(rows >= 0, self.names[rows], None)
+        return names.item() if names.ndim == 0 else names
+
+    def envelope(self, length_idx: int) -> list:
+        '''
+        Returns the (section name, W, Mr) envelope at the chart length of index 'length_idx', lightest first
+        '''
+        start, stop = self.offsets[length_idx], self.offsets[length_idx + 1]
+        return [
+            (str(self.names[row]), float(self.W[row]), float(Mr))
+            for row, Mr in zip(self.sections[start:stop], self.Mr[start:stop])]
+
+    def save(self, path: str) -> None:
+        '''
+        Writes the chart to a numpy .npz file
+        '''
+        np.savez(
+            path,
+            names = self.names.astype(str),
+            W = self.W,
+            lengths = self.lengths,
+            offsets = self.offsets,
+            sections = self.sections,
+            Mr = self.Mr,
+            **{f"param_{name}": value for name, value in self.params.items()})
+
+    @classmethod
+    def load(cls, path: str) -> "SelectionChart":
+        '''
+        Returns a chart written by save
+        '''
+        with np.load(path, allow_pickle=False) as data:
+            params = {name[len("param_"):]: data[name].item() for name in data.files if name.startswith("param_")}
+            return cls(data['names'], data['W'], data['lengths'], data['offsets'], data['sections'], data['Mr'], params)
@@ -1,28 +1,326 @@
+import csv
+import json
 import os
-import pandas as pd
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING
+import numpy as np
+import instrumentation
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def aisc_w_sections(units: str) -> pd.DataFrame:
+
+_CACHE_FOLDER = '.section_cache'
+_CACHE_VERSION = 1
+
+
+def _section_file(units: str) -> str:
     '''
-    Returns the AiSC W Sections from the appropriate csv file (located within the same folder as the python module file) with the desired units
+    Returns the path of the csv file holding the AISC W Sections in the desired units
+    '''
+    if units not in ("si", "us"):
+        raise ValueError(f"Unknown unit system: {units!r}. Expected 'si' or 'us'")
+    return os.path.abspath(f'aisc_w_sections_{units}.csv')
+
+
+# Scale factors from the csv file to base units (see the ReadME file)
+_SI_SCALE = {'Ix': 1e6, 'Zx': 1e3, 'Sx': 1e3, 'Iy': 1e6, 'Zy': 1e3, 'Sy': 1e3, 'J': 1e3, 'Cw': 1e9}
+
+
+def _parse_column(values: list) -> np.ndarray:
+    '''
+    Returns a csv column as int64 if every value is an integer, else float64, else text
+    '''
+    for dtype in (np.int64, np.float64):
+        try:
+            return np.array(values, dtype=dtype)
+        except ValueError:
+            pass
+    return np.array(values, dtype=str)
+
+
+def _read_section_columns(units: str) -> dict:
+    '''
+    Returns the columns of the AISC W Sections csv file with the desired units, unscaled to
+    base units, as a dict of column name to numpy array (text columns as fixed width unicode)
     '''
-    
+    with open(_section_file(units), newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        rows = list(reader)
+    columns = {name: _parse_column([row[idx] for row in rows]) for idx, name in enumerate(header)}
     if units == "si":
-        df = pd.read_csv(os.path.abspath('aisc_w_sections_si.csv'))
         #Unscale the data based on the ReadME file
-        df.Ix = df.Ix * 1e6
-        df.Zx = df.Zx * 1e3
-        df.Sx = df.Sx * 1e3
-        df.Iy = df.Iy * 1e6
-        df.Zy = df.Zy * 1e3
-        df.Sy = df.Sy * 1e3
-        df.J = df.J * 1e3
-        df.Cw = df.Cw * 1e9
-    elif units == "us":
-        df = pd.read_csv(os.path.abspath('aisc_w_sections_us.csv'))
+        for name, scale in _SI_SCALE.items():
+            columns[name] = columns[name] * scale
+    return columns
+
+
+def _column_cache_dir(units: str) -> str:
+    '''
+    Returns the folder holding the binary column cache of the csv file for the desired units
+    '''
+    path = _section_file(units)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), _CACHE_FOLDER, name)
+
+
+def _source_signature(path: str) -> dict:
+    '''
+    Returns the mtime and size of a file, used to detect when a cache is stale
+    '''
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _replace_atomically(path: str, write) -> None:
+    '''
+    Writes a file through 'write(file)' into a temporary file and moves it into place
+    so that concurrent readers never see a partially written file
+    '''
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@instrumentation.timed("sections_db.build_column_cache")
+def build_column_cache(units: str) -> dict:
+    '''
+    Writes the unscaled columns of the section csv file as one .npy file per column
+    (plus a manifest recording the csv it was built from) and returns the columns
+    '''
+    path = _section_file(units)
+    signature = _source_signature(path)
+    columns = _read_section_columns(units)
+    cache_dir = _column_cache_dir(units)
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, values in columns.items():
+        _replace_atomically(
+            os.path.join(cache_dir, f"{name}.npy"),
+            lambda file, values=values: np.save(file, values, allow_pickle=False))
+    manifest = {'version': _CACHE_VERSION, 'source': signature, 'columns': list(columns)}
+    _replace_atomically(
+        os.path.join(cache_dir, "manifest.json"),
+        lambda file: file.write(json.dumps(manifest).encode()))
+    return columns
+
+
+@instrumentation.timed("sections_db.section_columns")
+def section_columns(units: str) -> dict:
+    '''
+    Returns the unscaled columns of the AISC W Sections as a dict of column name to
+    numpy array, memory-mapped from the binary column cache. The cache is (re)built
+    when it is missing or the csv file has changed since it was written.
+    '''
+    cache_dir = _column_cache_dir(units)
+    signature = _source_signature(_section_file(units))
+    try:
+        with open(os.path.join(cache_dir, "manifest.json")) as file:
+            manifest = json.load(file)
+        if manifest['version'] == _CACHE_VERSION and manifest['source'] == signature:
+            return {
+                name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+                for name in manifest['columns']
+            }
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        build_column_cache(units)
+    except OSError:
+        # Read-only install: fall back to the in-memory columns
+        return _read_section_columns(units)
+    return section_columns(units)
+
+
+def _frame_from_columns(columns: dict) -> "pd.DataFrame":
+    '''
+    Returns a section table indexed by section name from a dict of columns
+    '''
+    import pandas as pd
+
+    df = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()})
     df = df.set_index("Section", drop=False)
     return df
 
 
+@instrumentation.timed("sections_db.aisc_w_sections")
+def aisc_w_sections(units: str) -> "pd.DataFrame":
+    '''
+    Returns the AiSC W Sections from the appropriate csv file (located within the same folder as the python module file) with the desired units
+    '''
+    return _frame_from_columns(section_columns(units))
+
+
+class SectionIndex:
+    """
+    Sorted per-column indexes of a section table for property range queries.
+
+    The sort order of a column is computed the first time the column is queried. A query
+    takes the rows in range of its most selective column from that column's index
+    (a binary search) and checks only those rows against the other ranges.
+
+    'columns', dict of column name to numpy array with the section names under 'Section'
+    """
+    def __init__(self, columns: dict):
+        self.columns = columns
+        self.names = np.asarray(columns['Section'])
+        self._sorted = {}
+
+    def sorted_column(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Returns (sorted values, row order) of a numeric column
+        '''
+        if name not in self._sorted:
+            if name not in self.columns:
+                raise KeyError(f"No column {name!r} in the section table")
+            values = np.asarray(self.columns[name])
+            if values.dtype.kind not in "iuf":
+                raise ValueError(f"Column {name!r} is not numeric")
+            order = np.argsort(values, kind="stable")
+            self._sorted[name] = (values[order], order)
+        return self._sorted[name]
+
+    def rows(self, **ranges) -> np.ndarray:
+        '''
+        Returns the row numbers, in table order, of the sections with every given column
+        within its (low, high) range. Bounds are inclusive and None leaves a side open.
+        '''
+        if not ranges:
+            return np.arange(self.names.size)
+        spans = []
+        for name, (low, high) in ranges.items():
+            values, order = self.sorted_column(name)
+            start = 0 if low is None else np.searchsorted(values, low, side="left")
+            stop = values.size if high is None else np.searchsorted(values, high, side="right")
+            spans.append((max(stop - start, 0), name, order[start:stop]))
+        spans.sort(key=lambda span: span[0])
+        rows = np.sort(spans[0][2])
+        for _, name, _ in spans[1:]:
+            low, high = ranges[name]
+            values = np.asarray(self.columns[name])[rows]
+            in_range = np.ones(rows.size, dtype=bool)
+            if low is not None:
+                in_range &= values >= low
+            if high is not None:
+                in_range &= values <= high
+            rows = rows[in_range]
+        return rows
+
+    def query(self, **ranges) -> list:
+        '''
+        Returns the names, in table order, of the sections with every given column within
+        its (low, high) range, e.g. query(d=(None, 460), bf=(150, None))
+        '''
+        return self.names[self.rows(**ranges)].tolist()
+
+
+class SectionCatalog:
+    """
+    A process-wide, load-once store of the AISC W Sections.
+
+    Each unit system is loaded from the binary column cache (see section_columns) the
+    first time it is asked for and then held in memory. The table is reloaded when the
+    modification time of the csv file changes; the file is stat-ed at most once
+    every 'check_interval' seconds so that repeated lookups do no I/O.
+
+    'check_interval', minimum number of seconds between checks of the csv mtime
+    """
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, units: str) -> dict:
+        '''
+        Returns the cached entry for the unit system, (re)loading it if the csv has changed
+        '''
+        entry = self._entries.get(units)
+        now = time.monotonic()
+        if entry is not None and now - entry['checked'] < self.check_interval:
+            return entry
+        with self._lock:
+            entry = self._entries.get(units)
+            mtime = os.stat(_section_file(units)).st_mtime_ns
+            if entry is None or entry['mtime'] != mtime:
+                columns = section_columns(units)
+                rows = zip(*(values.tolist() for values in columns.values()))
+                records = [dict(zip(columns, row)) for row in rows]
+                entry = {
+                    'mtime': mtime,
+                    'columns': columns,
+                    'table': None,
+                    'index': None,
+                    'records': dict(zip(columns['Section'].tolist(), records)),
+                }
+                self._entries[units] = entry
+            entry['checked'] = now
+            return entry
+
+    @instrumentation.timed("sections_db.SectionCatalog.table")
+    def table(self, units: str) -> "pd.DataFrame":
+        '''
+        Returns the cached section table indexed by section name (treat as read-only).
+        The DataFrame (and pandas) is only loaded when first asked for.
+        '''
+        entry = self._entry(units)
+        if entry['table'] is None:
+            entry['table'] = _frame_from_columns(entry['columns'])
+        return entry['table']
+
+    def columns(self, units: str) -> dict:
+        '''
+        Returns the memory-mapped columns of the section table as numpy arrays
+        '''
+        return self._entry(units)['columns']
+
+    @instrumentation.timed("sections_db.SectionCatalog.section")
+    def section(self, units: str, section_name: str) -> dict:
+        '''
+        Returns the properties of a single section as a dict of column name to value
+        '''
+        try:
+            return self._entry(units)['records'][section_name]
+        except KeyError:
+            raise KeyError(f"Section {section_name!r} is not in the {units} section database") from None
+
+    def section_names(self, units: str) -> list:
+        '''
+        Returns the names of all sections in the database, in file order
+        '''
+        return list(self._entry(units)['records'])
+
+    def index(self, units: str) -> SectionIndex:
+        '''
+        Returns the range query index of the section table
+        '''
+        entry = self._entry(units)
+        if entry['index'] is None:
+            entry['index'] = SectionIndex(entry['columns'])
+        return entry['index']
+
+    @instrumentation.timed("sections_db.SectionCatalog.query")
+    def query(self, units: str, **ranges) -> list:
+        '''
+        Returns the names, in file order, of the sections with every given property within
+        its inclusive (low, high) range; None leaves a side open.
+
+            CATALOG.query('si', d=(None, 460), bf=(150, None), W=(None, 80))
+        '''
+        return self.index(units).query(**ranges)
+
+    def clear(self) -> None:
+        '''
+        Drops every cached table so the next access reloads from disk
+        '''
+        with self._lock:
+            self._entries.clear()
+
 
-    
+CATALOG = SectionCatalog()
@@ -0,0 +1,70 @@
+import math
+import app_pipeline as ap
+import beams as bm
+
+
+params = {
+    'steel_sections': ['W150X22.5'],
+    'steel_section': 'W150X22.5',
+    'L_unbr': 2000,
+    'min_length': 200,
+    'max_length': 30000,
+    'curve_tolerance': 1e-3,
+    'omega_2': 1.0,
+    'fy': 345,
+    'E': 200,
+    'G': 77,
+    'phi': 0.9,
+    'curve_cache': None,
+}
+
+
+def test_pipeline_recomputes_only_changed_stages():
+    pipeline = ap.build_app_pipeline()
+    results = pipeline.run(**params)
+    assert pipeline.recomputed == list(pipeline.stages)
+    assert math.isclose(results['sample_beam']['Mrxu'], bm.steel_beam_from_section_name_si('W150X22.5', 2000, 345).moment_capacity())
+
+    pipeline.run(**params)
+    assert pipeline.recomputed == []
+
+    pipeline.run(**{**params, 'L_unbr': 4000})
+    assert 'curves' not in pipeline.recomputed
+    assert 'sample_beam' in pipeline.recomputed
+
+
+def test_map_stage_computes_only_new_items():
+    calls = []
+
+    def square(values, offset):
+        calls.append(list(values))
+        return [value ** 2 + offset for value in values]
+
+    pipeline = ap.Pipeline()
+    pipeline.add_stage('squares', square, ('values', 'offset'), map_over='values')
+    assert pipeline.run(values=[1, 2], offset=0)['squares'] == [1, 4]
+    assert pipeline.run(values=[1, 2, 3], offset=0)['squares'] == [1, 4, 9]
+    assert calls == [[1, 2], [3]]
+    assert pipeline.run(values=[3, 1], offset=1)['squares'] == [10, 2]
+    assert calls[-1] == [3, 1]
+
+
+def test_figure_switches_to_webgl_for_large_comparisons():
+    pipeline = ap.build_app_pipeline()
+    figure = pipeline.run(**params)['figure']
+    assert figure.data[0].type == 'scatter'
+
+    sections = list(bm.section_table('si').names[:12])
+    figure = pipeline.run(**{**params, 'steel_sections': sections, 'curve_tolerance': 1e-6})['figure']
+    assert figure.data[0].type == 'scattergl'
+    assert all(len(trace.x) <= 4 * ap.PLOT_RESOLUTION + 3 for trace in figure.data[:-1])
+
+
+def test_selection_chart_pipeline_is_separate():
+    assert 'selection_chart' not in ap.build_app_pipeline().stages
+    pipeline = ap.build_selection_chart_pipeline()
+    chart_params = {name: params[name] for name in ('min_length', 'max_length', 'omega_2', 'fy', 'E', 'G', 'phi')}
+    results = pipeline.run(**chart_params)
+    assert results['selection_chart'].lookup(45000, 4000) is not None
+    pipeline.run(**chart_params)
+    assert pipeline.recomputed == []
@@ -0,0 +1,81 @@
+import csv
+import json
+import math
+import batch_check as bc
+import beams as bm
+
+
+members = [
+    {'section': 'W150X22.5', 'length': 12000, 'fy': 345, 'omega_2': 1.0, 'Mf': 10000},
+    {'section': 'W130X23.8', 'length': 4000, 'fy': 345, 'omega_2': 1.0, 'Mf': 45000},
+    {'section': 'W150X22.5', 'length': 1200, 'fy': 345, 'omega_2': 1.0, 'Mf': 49369.5},
+]
+
+
+def test_check_members():
+    results = bc.check_members(members)
+    assert math.isclose(results[0]['Mr'], bm.steel_beam_from_section_name_si('W150X22.5', 12000, 345).moment_capacity())
+    assert results[0]['section_class'] == 4
+    assert [result['status'] for result in results] == ['PASS', 'FAIL', 'PASS']
+
+
+def test_main_streams_in_order(tmp_path):
+    input_path = tmp_path / 'members.jsonl'
+    input_path.write_text("\n".join(json.dumps(member) for member in members * 5))
+    output_path = tmp_path / 'results.csv'
+
+    assert bc.main([str(input_path), str(output_path), '--workers', '2', '--chunk-size', '2']) == 0
+
+    with open(output_path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row['section'] for row in rows] == [member['section'] for member in members * 5]
+    assert [row['status'] for row in rows] == ['PASS', 'FAIL', 'PASS'] * 5
+
+
+def test_check_members_omega_2_from_moment_diagrams():
+    rows = [
+        {'section': 'W310X38.7', 'length': 6000, 'fy': 345, 'Mf': 50000, 'moments': [0, 75000, 100000, 75000, 0]},
+        {'section': 'W310X38.7', 'length': 6000, 'fy': 345, 'Mf': 50000, 'moments': "100000;50000;0;-50000;-100000"},
+        {'section': 'W310X38.7', 'length': 6000, 'fy': 345, 'Mf': 50000, 'omega_2': 1.5, 'moments': [1, 1]},
+    ]
+    results = bc.check_members(rows)
+    assert math.isclose(results[0]['omega_2'], 400000 / math.sqrt(100000**2 + 8 * 75000**2 + 7 * 100000**2))
+    assert math.isclose(results[1]['omega_2'], 400000 / math.sqrt(100000**2 + 8 * 50000**2))
+    assert results[2]['omega_2'] == 1.5
+    assert math.isclose(results[0]['Mr'], bm.steel_beam_from_section_name_si('W310X38.7', 6000, 345, results[0]['omega_2']).moment_capacity())
+
+
+def test_bad_rows_are_reported_individually(tmp_path):
+    input_path = tmp_path / 'members.csv'
+    input_path.write_text(
+        "section,length,fy,omega_2,Mf\n"
+        "W150X22.5,12000,345,1.0,10000\n"
+        "W150X22.5,abc,345,1.0,10000\n"
+        "\n"
+        "W1X1,4000,345,1.0,10000\n"
+        "W150X22.5,4000,1e12,,10000\n"
+        "W130X23.8,4000,345,,45000\n")
+    output_path = tmp_path / 'results.csv'
+
+    assert bc.main([str(input_path), str(output_path), '--workers', '0', '--chunk-size', '2']) == 0
+
+    with open(output_path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert [row['status'] for row in rows] == ['PASS', 'ERROR', 'ERROR', 'ERROR', 'FAIL']
+    assert rows[1]['message'] == "line 3: 'length' is not a number: 'abc'"
+    assert rows[2]['message'].startswith("line 5: Section 'W1X1'")
+    assert rows[3]['message'].startswith("line 6: Web of W150X22.5")
+    assert rows[1]['section'] == 'W150X22.5' and rows[1]['Mr'] == ''
+
+
+def test_invalid_jsonl_line():
+    results = bc.check_members(bc.parse_member_lines('jsonl', None, ['{"section": ', json.dumps(members[0])]), line_numbers=[1, 2])
+    assert results[0]['status'] == 'ERROR' and results[0]['message'].startswith('line 1: Invalid member line')
+    assert results[1]['status'] == 'PASS'
+
+
+def test_zero_omega_2_is_an_error_in_a_valid_chunk():
+    lines = [json.dumps({**members[0], 'omega_2': 0}), json.dumps(members[1])]
+    results = bc.check_members(bc.parse_member_lines('jsonl', None, lines), line_numbers=[1, 2])
+    assert results[0]['status'] == 'ERROR' and results[0]['message'].startswith("line 1: 'omega_2' must be a finite positive")
+    assert results[1]['status'] == 'FAIL'
@@ -1,5 +1,6 @@
 import beams as bm
 import math
+import numpy as np
 
 
 steel_beam_1 = bm.steel_beam_from_section_name_si('W150X22.5',12000,345)
@@ -42,4 +43,122 @@ def test_steel_beam_from_section_name_si():
     assert bm.steel_beam_from_section_name_si('W150X22.5',12000,345).length == 12000
     assert bm.steel_beam_from_section_name_si('W150X22.5',12000,345).fy == 345
     assert bm.steel_beam_from_section_name_si('W150X22.5',12000,345).Ix == 12100000.0
-    assert bm.steel_beam_from_section_name_si('W150X22.5',12000,345).Cw == 20500000000.0
\ No newline at end of file
+    assert bm.steel_beam_from_section_name_si('W150X22.5',12000,345).Cw == 20500000000.0
+
+def test_section_class_array():
+    section_class_maj, section_class_min = bm.section_class_array(
+        [steel_beam_1.bf, steel_beam_4.bf],
+        [steel_beam_1.tf, steel_beam_4.tf],
+        [steel_beam_1.d, steel_beam_4.d],
+        [steel_beam_1.tw, steel_beam_4.tw],
+        345)
+    assert list(section_class_maj) == [4, 1]
+    assert list(section_class_min) == [4, 1]
+
+
+def test_moment_capacity_grid():
+    sections = {
+        name: [getattr(steel_beam_1, name), getattr(steel_beam_4, name)]
+        for name in ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')
+    }
+    grid = bm.moment_capacity_grid(sections, [12000, 4000, 1200], 345)
+    assert grid.shape == (2, 3)
+    expected = [steel_beam_1, steel_beam_2, steel_beam_3, steel_beam_4, steel_beam_5, steel_beam_6]
+    for actual, beam in zip(grid.ravel(), expected):
+        assert math.isclose(actual, beam.moment_capacity())
+
+
+def test_section_table_beam_view():
+    table = bm.section_table('si')
+    view = table.beam('W150X22.5', 12000, 345)
+    assert view.beam_tag == 'W150X22.5'
+    assert view.Ix == 12100000.0
+    assert view.Cw == 20500000000.0
+    assert view.section_class() == steel_beam_1.section_class()
+    assert math.isclose(view.moment_capacity(), steel_beam_1.moment_capacity())
+    assert view.to_steel_beam() == steel_beam_1
+    assert not hasattr(view, '__dict__')
+
+
+def test_section_table_subset():
+    table = bm.section_table('si').subset(['W150X22.5', 'W130X23.8'])
+    assert table.names == ('W150X22.5', 'W130X23.8')
+    grid = bm.moment_capacity_grid(table, [12000], 345)
+    assert math.isclose(grid[0, 0], steel_beam_1.moment_capacity())
+    assert math.isclose(grid[1, 0], steel_beam_4.moment_capacity())
+
+
+def test_unbraced_length_for_moment():
+    Mu = steel_beam_1.unbraced_moment()
+    length = bm.unbraced_length_for_moment(Mu, steel_beam_1.omega_2, steel_beam_1.Iy, steel_beam_1.J,
+                                           steel_beam_1.Cw, steel_beam_1.E, steel_beam_1.G)
+    assert math.isclose(length, steel_beam_1.length)
+
+
+def test_max_unbraced_length():
+    properties = [getattr(steel_beam_4, name) for name in ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')]
+    demands = [steel_beam_4.moment_capacity(), steel_beam_5.moment_capacity(), 0.0, 1e9]
+    lengths = bm.max_unbraced_length(demands, *properties, 345)
+    assert math.isclose(lengths[0], 12000)
+    assert math.isclose(lengths[1], 4000)
+    assert lengths[2] == math.inf
+    assert math.isnan(lengths[3])
+
+
+def test_section_invariants():
+    table = bm.section_table('si')
+    invariants = table.invariants(345)
+    assert table.invariants(345) is invariants
+    row = table.index('W150X22.5')
+    assert (invariants.section_class_maj[row], invariants.section_class_min[row]) == steel_beam_1.section_class()
+    assert math.isclose(invariants.Mpx[row], steel_beam_1.plastic_moment()[0])
+    assert math.isclose(invariants.Myx[row], steel_beam_1.yield_moment()[0])
+
+    subset = table.subset(['W150X22.5', 'W130X23.8'])
+    grid = subset.invariants(345).moment_capacity([12000, 4000, 1200])
+    expected = [steel_beam_1, steel_beam_2, steel_beam_3, steel_beam_4, steel_beam_5, steel_beam_6]
+    for actual, beam in zip(grid.ravel(), expected):
+        assert math.isclose(actual, beam.moment_capacity())
+    assert bm.SectionTable(table.names, table.columns).invariants(345) is not invariants
+
+
+def test_omega_2_from_moment_diagrams():
+    positions = np.linspace(0, 1, 101)
+    uniform_load = 4 * positions * (1 - positions)
+    double_curvature = 1 - 2 * positions
+    M = np.concatenate([uniform_load, double_curvature, [1, 0, 0, 0, 0], [0, 0]])
+    offsets = [0, 101, 202, 207, 209]
+    omega_2 = bm.omega_2_from_moment_diagrams(M, offsets)
+    assert np.allclose(omega_2, [4 / math.sqrt(1 + 4 * 0.75**2 + 7 + 4 * 0.75**2), 4 / math.sqrt(3), 2.5, 1.0])
+
+    # Unequally spaced samples give the same quarter point moments
+    x = np.concatenate([positions**2 * 3000, positions * 10])
+    M_uneven = np.concatenate([4 * positions**2 * (1 - positions**2), double_curvature])
+    assert np.allclose(bm.omega_2_from_moment_diagrams(M_uneven, offsets[:3], x), omega_2[:2], rtol=1e-3)
+
+
+def test_moment_capacity_derivatives():
+    section = bm.sect_db.CATALOG.section('si', 'W310X38.7')
+    properties = {name: section[name] for name in ('d', 'bf', 'tf', 'tw', 'Iy', 'Sx', 'Sy', 'Zx', 'Zy', 'Cw', 'J')}
+
+    def Mr(L_unbr, fy, omega_2):
+        return bm.moment_capacity(L_unbr, fy=fy, omega_2=omega_2, **properties)
+
+    # Plateau, inelastic and elastic branches
+    lengths = [800, 3000, 12000]
+    for L_unbr in lengths:
+        Mrxu, derivatives = bm.moment_capacity(L_unbr, fy=345, omega_2=1.3, derivatives=True, **properties)
+        assert Mrxu == Mr(L_unbr, 345, 1.3)
+        steps = {'L_unbr': (1e-3, 0, 0), 'fy': (0, 1e-5, 0), 'omega_2': (0, 0, 1e-7)}
+        for name, step in steps.items():
+            h = max(step)
+            forward = Mr(*(value + delta for value, delta in zip((L_unbr, 345, 1.3), step)))
+            backward = Mr(*(value - delta for value, delta in zip((L_unbr, 345, 1.3), step)))
+            assert math.isclose(derivatives[name], (forward - backward) / (2 * h), rel_tol=1e-5, abs_tol=1e-6)
+
+    Mr_array, derivatives_array = bm.moment_capacity_array(lengths, fy=345, omega_2=1.3, derivatives=True, **properties)
+    for idx, L_unbr in enumerate(lengths):
+        Mrxu, derivatives = bm.moment_capacity(L_unbr, fy=345, omega_2=1.3, derivatives=True, **properties)
+        assert math.isclose(Mr_array[idx], Mrxu)
+        for name, value in derivatives.items():
+            assert math.isclose(derivatives_array[name][idx], value, abs_tol=1e-9)
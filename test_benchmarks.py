@@ -0,0 +1,15 @@
+import benchmarks as bench
+
+
+def test_run_benchmarks():
+    results = bench.run_benchmarks(['beams.moment_capacity[scalar]'], repeat=1, min_time=0.01)
+    stats = results['results']['beams.moment_capacity[scalar]']
+    assert stats['median'] > 0
+    assert stats['repeat'] == 1
+
+
+def test_compare_flags_regressions():
+    baseline = {'results': {'a': {'median': 1.0}, 'b': {'median': 1.0}}}
+    results = {'results': {'a': {'median': 1.1}, 'b': {'median': 2.0}, 'c': {'median': 1.0}}}
+    rows = bench.compare(results, baseline, tolerance=0.25)
+    assert [(name, slower) for name, _, _, _, slower in rows] == [('a', False), ('b', True)]
@@ -0,0 +1,54 @@
+import math
+import numpy as np
+import beams as bm
+import capacity_curves as ccv
+import curve_cache as cc
+import sections_db as sect_db
+
+
+section = sect_db.CATALOG.section('si', 'W310X38.7')
+properties = {name: section[name] for name in cc.CURVE_PROPERTIES}
+
+
+def test_transition_lengths():
+    L_plateau, L_transition = ccv.transition_lengths(section, 345)
+    Mp = bm.plastic_moment(section['Zx'], section['Zy'], 345)[0]
+    assert math.isclose(bm.unbraced_moment(L_transition, 1.0, section['Iy'], section['J'], section['Cw'], 200, 77), 0.67 * Mp)
+    assert math.isclose(bm.moment_capacity_array(L_plateau, fy=345, **properties), 0.9 * Mp)
+
+
+def test_adaptive_capacity_curve_within_tolerance():
+    lengths, Mr = ccv.adaptive_capacity_curve(section, 200, 30000, 345, rtol=1e-3)
+    assert lengths.size < len(range(200, 30000, 200))
+    assert lengths[0] == 200 and lengths[-1] == 30000
+    assert np.all(np.diff(lengths) >= 0)
+
+    dense = np.linspace(200, 30000, 20000)
+    exact = bm.moment_capacity_array(dense, fy=345, **properties)
+    Mp = bm.plastic_moment(section['Zx'], section['Zy'], 345)[0]
+    assert np.abs(np.interp(dense, lengths, Mr) - exact).max() <= 1e-3 * 0.9 * Mp
+
+
+def test_adaptive_capacity_curves_cached(tmp_path):
+    table = bm.section_table('si').subset(['W310X38.7', 'W150X22.5'])
+    cache = cc.CurveCache(str(tmp_path / 'curves.sqlite3'))
+    curves = ccv.adaptive_capacity_curves(table, 200, 30000, 345, cache=cache)
+    cached = ccv.adaptive_capacity_curves(table, 200, 30000, 345, cache=cache)
+    assert len(cache) == 2
+    for (x, y), (x_cached, y_cached) in zip(curves, cached):
+        assert np.array_equal(x, x_cached)
+        assert np.array_equal(y, y_cached)
+
+
+def test_decimate_curve_keeps_shape_and_transitions():
+    transitions = ccv.transition_lengths(section, 345)
+    lengths, Mr = ccv.adaptive_capacity_curve(section, 200, 30000, 345, rtol=1e-6)
+    x, y = ccv.decimate_curve(lengths, Mr, 100, transitions)
+    assert x.size <= 4 * 100 + 3 < lengths.size
+    assert x[0] == 200 and x[-1] == 30000
+    assert y.max() == Mr.max() and y.min() == Mr.min()
+    assert np.count_nonzero(x == transitions[1]) == 2
+    assert transitions[0] in x
+
+    short = ccv.decimate_curve(lengths[:50], Mr[:50], 100)
+    assert np.array_equal(short[0], lengths[:50])
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import math
+import capacity_service as service
+import beams as bm
+import load_test
+
+
+async def _post(port, path, body):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = json.dumps(body).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(request)}\r\nConnection: close\r\n\r\n".encode() + request)
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_concurrent_requests_are_batched():
+    async def run():
+        capacity_service = service.CapacityService(window=0.01)
+        server = await capacity_service.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            lengths = [1000, 4000, 12000]
+            responses = await asyncio.gather(*(
+                _post(port, '/moment_capacity', {'section': 'W150X22.5', 'length': length, 'fy': 345})
+                for length in lengths))
+            missing = await _post(port, '/moment_capacity', {'section': 'W1X1', 'length': 1000, 'fy': 345})
+            selection = await _post(port, '/select', {'Mf': 45000, 'length': 4000, 'fy': 345})
+        return capacity_service, lengths, responses, missing, selection
+
+    capacity_service, lengths, responses, missing, selection = asyncio.run(run())
+    for length, (status, result) in zip(lengths, responses):
+        assert status == 200
+        assert math.isclose(result['Mr'], bm.steel_beam_from_section_name_si('W150X22.5', length, 345).moment_capacity())
+    assert capacity_service.batchers['/moment_capacity'][1].batches == 1
+    assert missing[0] == 404
+    assert selection[0] == 200 and selection[1]['Mr'] >= 45000
+
+
+def test_run_load_test():
+    async def run():
+        server = await service.CapacityService().start('127.0.0.1', 0)
+        async with server:
+            return await load_test.run_load_test('127.0.0.1', server.sockets[0].getsockname()[1], requests=200, concurrency=8)
+
+    result = asyncio.run(run())
+    assert result['requests'] == 200
+    assert result['p50_ms'] <= result['p99_ms']
+
+
+def test_bad_requests_fail_alone():
+    async def run():
+        capacity_service = service.CapacityService(window=0.01)
+        server = await capacity_service.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            batch = await asyncio.gather(*(
+                _post(port, '/moment_capacity', {'section': 'W150X22.5', 'length': 4000, 'fy': fy})
+                for fy in (345, 1e12, 350)))
+            invalid = await asyncio.gather(
+                _post(port, '/moment_capacity', {'section': 'W150X22.5', 'length': 4000, 'fy': 'nan'}),
+                _post(port, '/moment_capacity', {'section': 'W150X22.5', 'length': 0, 'fy': 345}),
+                _post(port, '/moment_capacity', {'length': 4000, 'fy': 345}),
+                _post(port, '/select', {'Mf': 45000, 'length': 4000, 'fy': 345, 'n_alternatives': -1}))
+        return batch, invalid
+
+    batch, invalid = asyncio.run(run())
+    assert [status for status, _ in batch] == [200, 400, 200]
+    assert [status for status, _ in invalid] == [400, 400, 400, 400]
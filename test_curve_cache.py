@@ -0,0 +1,33 @@
+import numpy as np
+import beams as bm
+import curve_cache as cc
+
+
+table = bm.section_table('si').subset(['W150X22.5', 'W130X23.8', 'W310X38.7'])
+lengths = np.arange(200, 30000, 200)
+
+
+def test_capacity_curves_cached(tmp_path):
+    cache = cc.CurveCache(str(tmp_path / 'curves.sqlite3'))
+    expected = bm.moment_capacity_grid(table, lengths, 345)
+    assert np.array_equal(cc.capacity_curves(table, lengths, 345, cache=cache), expected)
+    assert len(cache) == 3
+
+    reopened = cc.CurveCache(str(tmp_path / 'curves.sqlite3'))
+    key = cc.curve_key({name: table[name][0] for name in cc.CURVE_PROPERTIES}, lengths, 345)
+    assert np.array_equal(reopened.get(key), expected[0])
+    assert np.array_equal(cc.capacity_curves(table, lengths, 345, cache=reopened), expected)
+    assert reopened.get(cc.curve_key({name: table[name][0] for name in cc.CURVE_PROPERTIES}, lengths, 350)) is None
+
+
+def test_curve_cache_lru_eviction():
+    curve_bytes = lengths.size * 8
+    cache = cc.CurveCache(":memory:", max_bytes=2 * curve_bytes)
+    cache.put('a', lengths)
+    cache.put('b', lengths)
+    cache.get('a')
+    cache.put('c', lengths)
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.size() <= 2 * curve_bytes
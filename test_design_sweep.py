@@ -0,0 +1,30 @@
+import math
+import numpy as np
+import beams as bm
+import design_sweep as ds
+
+
+sections = ['W150X22.5', 'W130X23.8', 'W310X38.7']
+lengths = [1200, 4000, 12000]
+
+
+def test_sweep_matches_scalar_capacity():
+    result = ds.sweep(lengths, [300, 345], omega_2=[1.0, 1.75], sections=sections, workers=2)
+    assert result.dims == ('fy', 'omega_2', 'section', 'length')
+    assert result.values.shape == (2, 2, 3, 3)
+    assert result.fixed == {'E': 200, 'G': 77, 'phi': 0.9}
+    for i, fy in enumerate([300, 345]):
+        for j, omega_2 in enumerate([1.0, 1.75]):
+            for k, section in enumerate(sections):
+                for m, length in enumerate(lengths):
+                    beam = bm.steel_beam_from_section_name_si(section, length, fy, omega_2)
+                    assert math.isclose(result.values[i, j, k, m], beam.moment_capacity())
+
+
+def test_sweep_in_process_and_sel():
+    parallel = ds.sweep(lengths, 345, phi=[0.9, 0.95], sections=sections, workers=2, tasks_per_worker=3)
+    serial = ds.sweep(lengths, 345, phi=[0.9, 0.95], sections=sections, workers=0)
+    assert np.array_equal(parallel.values, serial.values)
+    selected = serial.sel(phi=0.95, section='W310X38.7')
+    assert selected.dims == ('length',)
+    assert math.isclose(selected.values[1], bm.steel_beam_from_section_name_si('W310X38.7', 4000, 345, phi=0.95).moment_capacity())
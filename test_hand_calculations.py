@@ -40,4 +40,18 @@ def test_calc_M():
     assert result[0] == result_1
     assert result[1] == result_2
     assert result[2] == result_3
-    assert result[3] == result_4
\ No newline at end of file
+    assert result[3] == result_4
+
+def test_render_section_class_memoized():
+    hc.render_section_class.cache_clear()
+    latex = hc.render_section_class(steel_beam_1.bf, steel_beam_1.tf, steel_beam_1.d, steel_beam_1.tw, steel_beam_1.fy)
+    assert latex == hc.calc_section_class(steel_beam_1.bf * si.mm, steel_beam_1.tf * si.mm, steel_beam_1.d * si.mm, steel_beam_1.tw * si.mm, steel_beam_1.fy)[0]
+    hc.render_section_class(steel_beam_1.bf, steel_beam_1.tf, steel_beam_1.d, steel_beam_1.tw, steel_beam_1.fy)
+    assert hc.render_section_class.cache_info().hits == 1
+
+
+def test_render_M():
+    latex = hc.render_M(steel_beam_1.Sx, steel_beam_1.Zx, steel_beam_1.fy, steel_beam_1.length, steel_beam_1.E,
+                        steel_beam_1.Iy, steel_beam_1.G, steel_beam_1.J, steel_beam_1.Cw, steel_beam_1.omega_2,
+                        steel_beam_1.section_class()[0], steel_beam_1.phi)
+    assert 'M_{rxu}' in latex
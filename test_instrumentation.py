@@ -0,0 +1,40 @@
+import json
+import threading
+import beams as bm
+import instrumentation
+
+
+def test_timed_counts_calls_only_when_enabled():
+    instrumentation.reset()
+    instrumentation.disable()
+    bm.steel_beam_from_section_name_si('W150X22.5', 2000, 345).moment_capacity()
+    assert instrumentation.snapshot() == {}
+
+    instrumentation.enable()
+    try:
+        beam = bm.steel_beam_from_section_name_si('W150X22.5', 2000, 345)
+        beam.moment_capacity()
+        beam.moment_capacity()
+        with instrumentation.stage('test.block'):
+            pass
+    finally:
+        instrumentation.disable()
+
+    timings = instrumentation.snapshot()
+    assert timings['beams.moment_capacity']['calls'] == 2
+    assert timings['beams.steel_beam_from_section_name_si']['calls'] == 1
+    assert timings['test.block']['calls'] == 1
+    assert json.loads(instrumentation.to_json()) == timings
+    instrumentation.reset()
+    assert instrumentation.snapshot() == {}
+
+
+def test_enabled_flag_is_per_thread():
+    instrumentation.enable()
+    try:
+        thread = threading.Thread(target=instrumentation.disable)
+        thread.start()
+        thread.join()
+        assert instrumentation.is_enabled()
+    finally:
+        instrumentation.disable()
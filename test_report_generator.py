@@ -0,0 +1,70 @@
+import os
+import report_generator as rg
+
+
+members = [
+    {'member': 'B1', 'section': 'W150X22.5', 'length': 2000.0, 'fy': 345.0, 'omega_2': 1.0},
+    {'member': 'B2', 'section': 'W150X22.5', 'length': 2000.0, 'fy': 345.0, 'omega_2': 1.0},
+    {'member': 'B3', 'section': 'W310X38.7', 'length': 6000.0, 'fy': 345.0, 'omega_2': 1.13},
+]
+
+
+def test_generate_reports_deduplicates_and_resumes(tmp_path):
+    output_dir = str(tmp_path / 'reports')
+    counts = rg.generate_reports(members, output_dir, workers=0)
+    assert counts == {'members': 3, 'reports': 2, 'rendered': 2, 'reused': 0}
+
+    files = sorted(os.listdir(output_dir))
+    assert len(files) == 3 and 'index.html' in files
+    with open(os.path.join(output_dir, 'index.html')) as file:
+        index = file.read()
+    assert 'B1' in index and 'B3' in index
+    report = rg.report_key('W310X38.7', 6000.0, 345.0, 1.13, 200, 77, 0.9) + '.html'
+    with open(os.path.join(output_dir, report)) as file:
+        assert 'M_{rxu}' in file.read()
+
+    os.remove(os.path.join(output_dir, report))
+    counts = rg.generate_reports(members, output_dir, workers=0)
+    assert counts == {'members': 3, 'reports': 2, 'rendered': 1, 'reused': 1}
+
+
+def test_main_with_process_pool(tmp_path):
+    input_path = tmp_path / 'members.csv'
+    input_path.write_text("member,section,length,fy,omega_2\nB1,W150X22.5,2000,345,1.0\nB2,W150X22.5,4000,345,\n")
+    output_dir = tmp_path / 'reports'
+    assert rg.main([str(input_path), str(output_dir), '--workers', '2', '--format', 'tex']) == 0
+    assert sorted(path.suffix for path in output_dir.iterdir()) == ['.tex', '.tex', '.tex']
+
+
+def test_reports_of_one_section_are_split_across_workers():
+    tasks = [('W150X22.5', length) for length in range(40)]
+    chunks = rg._chunks(tasks, 2 * 4)
+    assert len(chunks) == 8
+    assert [task for chunk in chunks for task in chunk] == tasks
+
+
+def test_tex_index_escapes_member_names(tmp_path):
+    tagged = [{**members[0], 'member': 'B1 & 50% #2 $x_1'}]
+    rg.generate_reports(tagged, str(tmp_path), workers=0, report_format='tex')
+    with open(tmp_path / 'index.tex') as file:
+        index = file.read()
+    assert r'B1 \& 50\% \#2 \$x\_1' in index
+    assert rg.tex_escape('a\\b{c}') == r'a\textbackslash{}b\{c\}'
+
+
+def test_main_skips_invalid_members(tmp_path, capsys):
+    input_path = tmp_path / 'members.csv'
+    input_path.write_text(
+        "member,section,length,fy,omega_2\n"
+        "B1,W150X22.5,2000,345,1.0\n"
+        "B2,W150X22.5,abc,345,1.0\n"
+        "B3,W150X22.5,2000,1e12,1.0\n"
+        "B4,W150X22.5,2000,345,0\n")
+    output_dir = tmp_path / 'reports'
+    assert rg.main([str(input_path), str(output_dir), '--workers', '2']) == 0
+    files = sorted(path.name for path in output_dir.iterdir())
+    assert len(files) == 2 and 'index.html' in files
+    stderr = capsys.readouterr().err
+    assert "line 3: 'length' is not a number: 'abc'" in stderr
+    assert "line 4: Web of W150X22.5" in stderr
+    assert "line 5: 'omega_2' must be a finite positive number" in stderr
@@ -0,0 +1,72 @@
+import math
+import numpy as np
+import beams as bm
+import capacity_curves as ccv
+import section_selection as ss
+import sections_db as sect_db
+
+
+table = bm.section_table('si')
+
+
+def brute_force(Mf, L_unbr, fy, omega_2=1.0):
+    passing = []
+    for name in table.names:
+        beam = table.beam(name, L_unbr, fy, omega_2)
+        Mr = beam.moment_capacity()
+        if Mr >= Mf:
+            passing.append((table['W'][table.index(name)], table.index(name), name, Mr))
+    passing.sort()
+    return [(name, W, Mr) for W, _, name, Mr in passing]
+
+
+def test_select_section():
+    selection = ss.select_section(150000, 4000, 345, n_alternatives=3)
+    expected = brute_force(150000, 4000, 345)
+    assert selection.section == expected[0][0]
+    assert math.isclose(selection.Mr, expected[0][2])
+    assert selection.utilization <= 1
+    assert [name for name, W, Mr in selection.alternatives] == [name for name, W, Mr in expected[1:4]]
+
+
+def test_select_sections_batch():
+    demands = [(20000, 1200, 345, 1.0), (400000, 8000, 300, 1.75), (1e12, 1000, 345, 1.0)]
+    selections = ss.select_sections(*zip(*demands), n_alternatives=2)
+    for selection, demand in zip(selections[:2], demands[:2]):
+        expected = brute_force(*demand)
+        assert selection.section == expected[0][0]
+        assert [name for name, W, Mr in selection.alternatives] == [name for name, W, Mr in expected[1:3]]
+    assert selections[2].section is None
+    assert selections[2].alternatives == []
+
+
+def test_selection_chart_matches_search(tmp_path):
+    chart = ss.SelectionChart.build(np.linspace(1000, 12000, 23), 345, omega_2=1.25)
+    Mf = np.array([20000, 150000, 400000, 1e12])
+    L_unbr = np.array([1000, 4000, 8000, 4000])
+    expected = [selection.section for selection in ss.select_sections(Mf, L_unbr, 345, omega_2=1.25, n_alternatives=0)]
+    assert list(chart.lookup(Mf, L_unbr)) == expected
+    assert chart.lookup(150000, 4000) == expected[1]
+    assert chart.lookup(150000, 20000) is None
+
+    # Between chart lengths the next longer chart length is used
+    name = chart.lookup(150000, 3800)
+    assert table.beam(name, 3800, 345, 1.25).moment_capacity() >= 150000
+
+    path = str(tmp_path / 'chart.npz')
+    chart.save(path)
+    loaded = ss.SelectionChart.load(path)
+    assert loaded.params == chart.params
+    assert list(loaded.lookup(Mf, L_unbr)) == expected
+    assert loaded.envelope(3) == chart.envelope(3)
+
+
+def test_selection_chart_is_conservative_below_branch_switch():
+    lengths = np.linspace(200, 30000, 200)
+    chart = ss.SelectionChart.build(lengths, 345)
+    section = sect_db.CATALOG.section('si', 'W310X253')
+    L_unbr = ccv.transition_lengths(section, 345)[1] * (1 - 1e-9)
+    next_length = lengths[np.searchsorted(lengths, L_unbr)]
+    Mf = table.beam('W310X253', next_length, 345).moment_capacity()
+    name = chart.lookup(Mf, L_unbr)
+    assert table.beam(name, L_unbr, 345).moment_capacity() >= Mf
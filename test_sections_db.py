@@ -1,3 +1,5 @@
+import os
+import numpy as np
 import sections_db as sections
 
 
@@ -22,3 +24,47 @@ def test_aisc_w_sections():
                                                                     'Cw': 4240000000.0}
     
 
+
+
+def test_section_catalog_lookup():
+    catalog = sections.SectionCatalog()
+    section = catalog.section('si', 'W150X13')
+    assert section['Ix'] == 6200000.0
+    assert section['Cw'] == 4240000000.0
+    assert catalog.table('si') is catalog.table('si')
+    assert catalog.section_names('si')[0] == 'W1100X499'
+
+
+def test_section_catalog_reloads_on_mtime_change():
+    catalog = sections.SectionCatalog(check_interval=0)
+    table = catalog.table('si')
+    path = sections._section_file('si')
+    stat = os.stat(path)
+    try:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert catalog.table('si') is not table
+    finally:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def test_section_columns_memory_mapped_cache():
+    columns = sections.section_columns('si')
+    assert isinstance(columns['Ix'], np.memmap)
+    csv_columns = sections._read_section_columns('si')
+    assert list(columns) == list(csv_columns)
+    assert list(columns['Section']) == list(csv_columns['Section'])
+    assert columns['A'].dtype == np.int64
+    assert np.array_equal(columns['Cw'], csv_columns['Cw'])
+    assert os.path.exists(os.path.join(sections._column_cache_dir('si'), 'manifest.json'))
+
+
+def test_section_catalog_range_query():
+    catalog = sections.SectionCatalog()
+    table = catalog.table('si')
+    names = catalog.query('si', d=(None, 460), bf=(150, None), W=(None, 80))
+    expected = table[(table['d'] <= 460) & (table['bf'] >= 150) & (table['W'] <= 80)]['Section']
+    assert names == list(expected)
+    assert 'W150X22.5' in names
+    assert catalog.query('si', Zx=(93900.0, 93900.0)) == ['W150X13']
+    assert catalog.query('si', d=(500, 400)) == []
+    assert len(catalog.query('si')) == len(table)